@@ -1,34 +1,48 @@
-from flask import Flask
+import importlib
+import os
+
+from flask import Flask, jsonify
 from flask_cors import CORS
 
-# Import all your Blueprints
-from visualize_api import visualize_api
-from species_api import species_api
-from network_api import network_api
-from characterize_api import characterize_api
-from convert_api import convert_api
-from motif_api import motif_api
-from draw_api import draw_api
-from descriptor_api import descriptor_api
-from seq_align_api import seq_align_api
-from pathway_api import pathway_api
-from insight_api import insight_api
-from model_api import model_api
+from lazy_loading import print_startup_report, start_warm_up, startup_report, timed
+
+# Each module exposes a Blueprint with the same name as the module. Heavy resources inside them
+# (model, substitution matrix, glycowork modules, ...) are LazyResources loaded on first use.
+BLUEPRINT_MODULES = [
+    "visualize_api",
+    "species_api",
+    "network_api",
+    "characterize_api",
+    "convert_api",
+    "motif_api",
+    "draw_api",
+    "descriptor_api",
+    "seq_align_api",
+    "pathway_api",
+    "insight_api",
+    "model_api",
+    "jobs_api",
+]
+
+# Set WARM_UP=0 to load resources strictly on first use instead of in a background thread.
+WARM_UP = os.environ.get("WARM_UP", "1") != "0"
+
 app = Flask(__name__)
 CORS(app)
 
-# Register Blueprints
-app.register_blueprint(visualize_api)
-app.register_blueprint(species_api)
-app.register_blueprint(network_api)
-app.register_blueprint(characterize_api)
-app.register_blueprint(convert_api)
-app.register_blueprint(motif_api)
-app.register_blueprint(draw_api)
-app.register_blueprint(descriptor_api)
-app.register_blueprint(seq_align_api)
-app.register_blueprint(pathway_api)
-app.register_blueprint(insight_api)
-app.register_blueprint(model_api)
+# Import and register Blueprints
+for module_name in BLUEPRINT_MODULES:
+    with timed(f"import {module_name}"):
+        module = importlib.import_module(module_name)
+    app.register_blueprint(getattr(module, module_name))
+
+@app.route("/startup", methods=["GET"])
+def startup():
+    return jsonify(startup_report())
+
+print_startup_report()
+if WARM_UP:
+    start_warm_up()
+
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
@@ -0,0 +1,76 @@
+import hashlib
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+# Compiled artifacts (binary matrices, indexes, SQLite stores) live here, next to the sources they are built from.
+CACHE_DIR = os.environ.get('GLYCAN_CACHE_DIR', 'cache')
+
+# The labeled glycan corpus the vocabulary, indexes, descriptor table and benchmarks are built from.
+DATASET_PATH = "dataset/merged_glycan_dataset.csv"
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_path(name):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, name)
+
+
+def atomic_write(path, write):
+    """Calls write(tmp_path) and renames the result over `path`, so concurrent readers never see a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def save_npy_atomic(path, array):
+    """Writes `array` to `path` in .npy format via atomic_write, so it can be memory-mapped while being replaced."""
+    def write(tmp_path):
+        # np.save appends ".npy" to names without it, so write through a file object.
+        with open(tmp_path, 'wb') as f:
+            np.save(f, array)
+    atomic_write(path, write)
+
+
+def connect_sqlite(name, schema):
+    """Opens cache/<name> in WAL mode (concurrent readers alongside one writer) and applies `schema`.
+
+    sqlite3 connections must not cross threads or a fork, so callers keep one per (thread, pid) via SQLiteConnections.
+    """
+    conn = sqlite3.connect(cache_path(name), timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(schema)
+    conn.commit()
+    return conn
+
+
+class SQLiteConnections:
+    """Hands out one connect_sqlite connection to cache/<name> per (thread, pid), reopening it after a fork."""
+
+    def __init__(self, name, schema, row_factory=None):
+        self.name = name
+        self.schema = schema
+        self.row_factory = row_factory
+        self._local = threading.local()
+
+    def get(self):
+        if getattr(self._local, "pid", None) != os.getpid():
+            self._local.conn = connect_sqlite(self.name, self.schema)
+            if self.row_factory is not None:
+                self._local.conn.row_factory = self.row_factory
+            self._local.pid = os.getpid()
+        return self._local.conn
@@ -0,0 +1,192 @@
+"""Glycan format conversion (IUPAC, GlycoCT, WURCS -> IUPAC, GlycoCT, WURCS, SMILES), one record or many.
+
+Batches are cut into chunks converted in a process pool, with at most CONVERT_IN_FLIGHT chunks
+submitted at a time; results come back in input order as soon as each chunk is done, every
+record carries either its outputs or its own error, and only the requested output formats are
+dumped.
+
+Run from src/Backend:
+    python batch_convert.py dump.glycoct converted.ndjson --outputs iupac smiles --workers 8
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from glypy.io import iupac, glycoct, wurcs
+
+from iupac_cache import canonical_smiles
+
+INPUT_FORMATS = ('iupac', 'glycoct', 'wurcs')
+OUTPUT_FORMATS = ('iupac', 'glycoct', 'wurcs', 'smiles')
+
+# Loaders and dumpers for different formats
+LOADERS = {'glycoct': glycoct.loads, 'wurcs': wurcs.loads, 'iupac': None}
+DUMPERS = {'glycoct': glycoct.dumps, 'wurcs': wurcs.dumps, 'iupac': iupac.dumps}
+
+CONVERT_WORKERS = int(os.environ.get('CONVERT_WORKERS', os.cpu_count() or 1))
+# Records per pool task; batches no larger than one chunk are converted in-process.
+CONVERT_CHUNK_SIZE = int(os.environ.get('CONVERT_CHUNK_SIZE', 64))
+# Chunks one batch may have submitted to the pool at once.
+CONVERT_IN_FLIGHT = int(os.environ.get('CONVERT_IN_FLIGHT', 2 * max(1, CONVERT_WORKERS)))
+
+
+def detect_format(glycan):
+    text = glycan.lstrip()
+    if text.startswith('WURCS='):
+        return 'wurcs'
+    if text.startswith('RES'):
+        return 'glycoct'
+    return 'iupac'
+
+
+def convert_record(glycan, input_format, outputs=OUTPUT_FORMATS):
+    """Converts one record into the requested output formats; raises on unreadable input."""
+    if input_format == 'auto':
+        input_format = detect_format(glycan)
+    if input_format not in INPUT_FORMATS:
+        raise ValueError(f'Unsupported input format: {input_format}')
+
+    result = {}
+    if input_format == 'iupac':
+        # Convert IUPAC to canonical form and SMILES
+        if 'iupac' in outputs or 'smiles' in outputs:
+            canonical, smiles = canonical_smiles(glycan)
+            if 'iupac' in outputs:
+                result['iupac'] = canonical
+            if 'smiles' in outputs:
+                result['smiles'] = smiles
+        if 'glycoct' in outputs:
+            result['glycoct'] = 'Conversion from IUPAC to GlycoCT not supported.'
+        if 'wurcs' in outputs:
+            result['wurcs'] = 'Conversion from IUPAC to WURCS not supported.'
+        return result
+
+    # Convert GlycoCT or WURCS to IUPAC, GlycoCT, WURCS, SMILES
+    structure = LOADERS[input_format](glycan)
+    for fmt in ('glycoct', 'wurcs'):
+        if fmt in outputs:
+            result[fmt] = DUMPERS[fmt](structure)
+    if 'iupac' in outputs or 'smiles' in outputs:
+        iupac_str = DUMPERS['iupac'](structure)
+        if 'iupac' in outputs:
+            result['iupac'] = iupac_str
+        if 'smiles' in outputs:
+            try:
+                result['smiles'] = canonical_smiles(iupac_str)[1]
+            except Exception as e:
+                result['smiles'] = f'SMILES conversion failed: {str(e)}'
+    return result
+
+
+def convert_chunk(records, outputs):
+    """Runs in a pool worker: (index, glycan, input_format) -> result dict with an 'error' on failure."""
+    out = []
+    for index, glycan, input_format in records:
+        try:
+            out.append({'index': index, **convert_record(glycan, input_format, outputs)})
+        except Exception as e:
+            out.append({'index': index, 'error': f'Conversion failed: {str(e)}'})
+    return out
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def conversion_pool():
+    """The process pool of this process, created on first use (and again after a fork)."""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            # spawn, not fork: the server process holds threads and locks children must not inherit.
+            _pool = ProcessPoolExecutor(max_workers=CONVERT_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def convert_batch(records, outputs=OUTPUT_FORMATS, chunk_size=CONVERT_CHUNK_SIZE, pool=None,
+                  in_flight=CONVERT_IN_FLIGHT):
+    """Yields one result dict per (glycan, input_format) record, in input order."""
+    tasks = [(i, glycan.strip(), input_format) for i, (glycan, input_format) in enumerate(records)]
+    if len(tasks) <= chunk_size:
+        yield from convert_chunk(tasks, outputs)
+        return
+    chunks = (tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size))
+    pool = pool or conversion_pool()
+    # Chunks are submitted as earlier ones finish instead of all at once, so concurrent batches
+    # share the pool and an abandoned batch leaves little queued behind it.
+    pending = deque()
+    try:
+        while True:
+            for chunk in islice(chunks, max(0, max(1, in_flight) - len(pending))):
+                pending.append(pool.submit(convert_chunk, chunk, outputs))
+            if not pending:
+                return
+            results = pending[0].result()
+            pending.popleft()
+            yield from results
+    finally:
+        for future in pending:
+            future.cancel()  # the client went away
+
+
+def split_records(text, input_format='auto'):
+    """Splits a dump into records: multi-line GlycoCT blocks (each starting at RES), else one per line."""
+    records, block = [], None
+    for line in text.splitlines():
+        stripped = line.strip()
+        if block is not None and stripped and stripped != 'RES' and detect_format(stripped) != 'wurcs':
+            block.append(line)
+            continue
+        if block is not None:
+            records.append('\n'.join(block))
+            block = None
+        if not stripped:
+            continue
+        if stripped == 'RES' and input_format in ('auto', 'glycoct'):
+            block = [line]
+        else:
+            records.append(stripped)
+    if block is not None:
+        records.append('\n'.join(block))
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="file of records: GlycoCT blocks and/or one IUPAC or WURCS record per line")
+    parser.add_argument("output", help="NDJSON output, one result per record ('-' for stdout)")
+    parser.add_argument("--input-format", choices=('auto',) + INPUT_FORMATS, default='auto')
+    parser.add_argument("--outputs", nargs="+", choices=OUTPUT_FORMATS, default=list(OUTPUT_FORMATS))
+    parser.add_argument("--workers", type=int, default=CONVERT_WORKERS)
+    parser.add_argument("--chunk-size", type=int, default=CONVERT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    with open(args.input, 'r') as f:
+        records = split_records(f.read(), args.input_format)
+    out = sys.stdout if args.output == '-' else open(args.output, 'w')
+    n_errors = 0
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            batch = convert_batch([(r, args.input_format) for r in records], args.outputs, args.chunk_size, pool,
+                                  in_flight=2 * args.workers)
+            for i, result in enumerate(batch, 1):
+                n_errors += 'error' in result
+                out.write(json.dumps(result) + '\n')
+                if i % 1000 == 0:
+                    print(f"{i}/{len(records)} records converted", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"Converted {len(records) - n_errors}/{len(records)} records ({n_errors} errors).", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
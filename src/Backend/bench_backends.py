@@ -0,0 +1,68 @@
+"""Latency/throughput of each inference backend (eager fp32, TorchScript, dynamic int8) over the dataset.
+
+Run from src/Backend:  python bench_backends.py --batch-size 64 --repeat 3
+"""
+import argparse
+import statistics
+import time
+
+import pandas as pd
+import torch
+
+from artifact_cache import DATASET_PATH
+from glycan_graph import collate_token_lists
+from glycoword_tokenizer import GlycowordTokenizer
+from immuno_model import INFERENCE_BACKENDS, MODEL_PATH, backend_max_error, compile_backend, load_model
+
+VOCAB_PATH = "glycoword_vocab.json"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    parser.add_argument("--backends", nargs="+", default=list(INFERENCE_BACKENDS), choices=INFERENCE_BACKENDS)
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    device = torch.device("cpu")
+
+    tokenizer = GlycowordTokenizer.from_file(VOCAB_PATH, unknown='skip')
+    sequences = pd.read_csv(DATASET_PATH).glycan.dropna().tolist()
+    graphs = [ids.tolist() for ids in tokenizer.encode(sequences) if len(ids)]
+    inputs = [collate_token_lists(graphs[i:i + args.batch_size]) for i in range(0, len(graphs), args.batch_size)]
+
+    reference = load_model(MODEL_PATH, len(tokenizer) + 1, device)
+    print(f"{len(graphs)} glycans, batch size {args.batch_size}, {torch.get_num_threads()} threads")
+    print(f"{'backend':<12}{'max |dScore|':>14}{'p50 ms':>10}{'p95 ms':>10}{'seq/s':>12}")
+
+    for backend in args.backends:
+        try:
+            module = compile_backend(reference, backend)
+        except Exception as e:
+            print(f"{backend:<12} unavailable: {e}")
+            continue
+        error = max(backend_max_error(reference, module, batch_inputs) for batch_inputs in inputs)
+
+        latencies = []
+        with torch.no_grad():
+            module(*inputs[0])  # warm-up (TorchScript profiling runs)
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                for batch_inputs in inputs:
+                    t0 = time.perf_counter()
+                    module(*batch_inputs)
+                    latencies.append(time.perf_counter() - t0)
+            elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        p50 = statistics.median(latencies) * 1e3
+        p95 = latencies[int(0.95 * (len(latencies) - 1))] * 1e3
+        throughput = len(graphs) * args.repeat / elapsed
+        print(f"{backend:<12}{error:>14.2e}{p50:>10.2f}{p95:>10.2f}{throughput:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
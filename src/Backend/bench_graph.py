@@ -0,0 +1,74 @@
+"""Graph assembly: per-request Data + Batch.from_data_list vs. cached path templates.
+
+Run from src/Backend:  python bench_graph.py --batch-sizes 1 32 256 1024
+"""
+import argparse
+import time
+
+import pandas as pd
+import torch
+from torch_geometric.data import Batch, Data
+
+from artifact_cache import DATASET_PATH
+from glycan_graph import collate_token_lists, sequence_to_graph
+from glycoword_tokenizer import GlycowordTokenizer
+
+VOCAB_PATH = "glycoword_vocab.json"
+
+
+def legacy_sequence_to_graph(seq_tokens, label=0):
+    # The pre-template implementation: edge lists rebuilt in Python for every request.
+    x = torch.tensor(seq_tokens, dtype=torch.long).view(-1, 1)
+    edge_indices = [[i, i + 1] for i in range(len(seq_tokens) - 1)]
+    edge_indices += [[i + 1, i] for i in range(len(seq_tokens) - 1)]
+    edge_index = torch.tensor(edge_indices, dtype=torch.long).t().contiguous() if edge_indices else torch.empty((2, 0), dtype=torch.long)
+    y = torch.tensor([label], dtype=torch.float)
+    return Data(x=x, edge_index=edge_index, y=y)
+
+
+def legacy_collate(token_lists):
+    batch = Batch.from_data_list([legacy_sequence_to_graph(t) for t in token_lists])
+    return batch.x, batch.edge_index, batch.batch
+
+
+def template_data_collate(token_lists):
+    batch = Batch.from_data_list([sequence_to_graph(t) for t in token_lists])
+    return batch.x, batch.edge_index, batch.batch
+
+
+def time_per_batch(fn, batches, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for token_lists in batches:
+            fn(token_lists)
+        best = min(best, time.perf_counter() - start)
+    return best / len(batches)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 64, 256, 1024])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tokenizer = GlycowordTokenizer.from_file(VOCAB_PATH, unknown='skip')
+    sequences = pd.read_csv(DATASET_PATH).glycan.dropna().tolist()
+    token_lists = [ids.tolist() for ids in tokenizer.encode(sequences) if len(ids)]
+
+    # The template path must reproduce the legacy tensors exactly.
+    for expected, actual in zip(legacy_collate(token_lists), collate_token_lists(token_lists)):
+        assert torch.equal(expected, actual), "collate_token_lists diverges from Batch.from_data_list"
+
+    paths = [("legacy Data+Batch", legacy_collate), ("template Data+Batch", template_data_collate),
+             ("template collate", collate_token_lists)]
+    print(f"{len(token_lists)} glycans; mean ms per batch")
+    print(f"{'batch':>6}" + "".join(f"{name:>22}" for name, _ in paths) + f"{'speedup':>10}")
+    for batch_size in args.batch_sizes:
+        batches = [token_lists[i:i + batch_size] for i in range(0, len(token_lists), batch_size)]
+        times = [time_per_batch(fn, batches, args.repeat) for _, fn in paths]
+        print(f"{batch_size:>6}" + "".join(f"{t * 1e3:>22.3f}" for t in times) + f"{times[0] / times[-1]:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Stage-by-stage latency/throughput benchmark of the model path over merged_glycan_dataset.csv.
+
+Replays the dataset's glycans through each stage separately (motif_find, process_glycans,
+string_to_labels, sequence_to_graph, the forward pass and the full /predict request) at batch
+sizes 1..1024, and reports p50/p95/p99 latency per batch, sequences/sec and peak RSS as JSON.
+
+The glycan_scanner behaviour checks (check_scanner.py) run first; a failure exits 1 before any
+timing, so a fast but wrong tokenizer cannot pass.
+
+Run from src/Backend:
+    python bench_suite.py --output bench.json
+    python bench_suite.py --baseline bench.json --max-regression 0.10   # exit 1 on regression
+"""
+import argparse
+import json
+import platform
+import resource
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from artifact_cache import DATASET_PATH
+from check_scanner import run_checks
+
+BATCH_SIZES = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024]
+STAGES = ["motif_find", "process_glycans", "string_to_labels", "sequence_to_graph", "forward", "predict_request"]
+
+
+def peak_rss_mb():
+    # ru_maxrss is the process-wide high-water mark (KiB on Linux, bytes on macOS).
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def build_stages():
+    """Returns {stage: (prepare(batch_of_sequences) -> input, run(input))}; only `run` is timed."""
+    import torch
+    import model_api
+    from glycan_graph import collate_token_lists
+
+    runtime = model_api.RUNTIME.get()
+    tokenizer = model_api.TOKENIZER
+    model_api.result_cache.maxsize = 0  # measure the uncached path
+    client = _test_client()
+
+    def tokens_of(batch):
+        return [tokenizer.encode_glycowords(model_api.process_glycans([s])) for s in batch]
+
+    def forward(inputs):
+        with torch.no_grad():
+            runtime.model(*inputs)
+
+    def predict_request(batch):
+        if len(batch) == 1:
+            response = client.post("/predict", json={"sequence": batch[0]})
+        else:
+            response = client.post("/predict/batch", json={"sequences": batch})
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+    return {
+        "motif_find": (lambda b: b, lambda b: [model_api.motif_find(s) for s in b]),
+        "process_glycans": (lambda b: b, lambda b: [model_api.process_glycans([s]) for s in b]),
+        "string_to_labels": (lambda b: [model_api.process_glycans([s]) for s in b],
+                             lambda words: [tokenizer.encode_glycowords(w) for w in words]),
+        "sequence_to_graph": (tokens_of, collate_token_lists),
+        "forward": (lambda b: tuple(t.to(runtime.device) for t in collate_token_lists(tokens_of(b))), forward),
+        "predict_request": (lambda b: b, predict_request),
+    }
+
+
+def _test_client():
+    from flask import Flask
+    from model_api import model_api
+    app = Flask(__name__)
+    app.register_blueprint(model_api)
+    return app.test_client()
+
+
+def scorable_sequences():
+    import model_api
+    sequences = pd.read_csv(DATASET_PATH).glycan.dropna().str.strip().tolist()
+    words = [model_api.process_glycans([s]) for s in sequences]
+    return [s for s, w in zip(sequences, words) if w and not model_api.TOKENIZER.unknown_glycowords(w)]
+
+
+def run_stage(prepare, run, sequences, batch_size, min_batches, min_seconds):
+    batches = [sequences[i:i + batch_size] for i in range(0, len(sequences), batch_size)]
+    batches = [b for b in batches if len(b) == batch_size] or batches[:1]
+    inputs = [prepare(b) for b in batches]
+    run(inputs[0])  # warm-up
+
+    latencies, n_sequences = [], 0
+    started = time.perf_counter()
+    while len(latencies) < min_batches or time.perf_counter() - started < min_seconds:
+        for batch, payload in zip(batches, inputs):
+            t0 = time.perf_counter()
+            run(payload)
+            latencies.append(time.perf_counter() - t0)
+            n_sequences += len(batch)
+    total = sum(latencies)
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1e3, [50, 95, 99])
+    return {
+        "batch_size": len(batches[0]),
+        "n_batches": len(latencies),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "seqs_per_sec": n_sequences / total if total else 0.0,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+def compare(results, baseline, max_regression):
+    """Returns a list of human-readable regressions (p50 slower or throughput lower by > max_regression)."""
+    previous = {(r["stage"], r["batch_size"]): r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        old = previous.get((r["stage"], r["batch_size"]))
+        if not old:
+            continue
+        if r["p50_ms"] > old["p50_ms"] * (1 + max_regression):
+            regressions.append(f"{r['stage']} @ {r['batch_size']}: p50 {old['p50_ms']:.3f} -> {r['p50_ms']:.3f} ms")
+        if r["seqs_per_sec"] < old["seqs_per_sec"] * (1 - max_regression):
+            regressions.append(f"{r['stage']} @ {r['batch_size']}: {old['seqs_per_sec']:.0f} -> {r['seqs_per_sec']:.0f} seq/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=BATCH_SIZES)
+    parser.add_argument("--min-batches", type=int, default=20, help="minimum timed batches per measurement")
+    parser.add_argument("--min-seconds", type=float, default=0.5, help="minimum timed seconds per measurement")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="results JSON of a previous run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.10, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    if not run_checks():
+        sys.exit(1)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+
+    sequences = scorable_sequences()
+    stages = build_stages()
+    results = []
+    for stage in args.stages:
+        prepare, run = stages[stage]
+        for batch_size in args.batch_sizes:
+            result = {"stage": stage, **run_stage(prepare, run, sequences, batch_size, args.min_batches, args.min_seconds)}
+            results.append(result)
+            print(f"{stage:<18}{result['batch_size']:>6}  p50 {result['p50_ms']:9.3f} ms  p95 {result['p95_ms']:9.3f} ms  "
+                  f"p99 {result['p99_ms']:9.3f} ms  {result['seqs_per_sec']:>11,.0f} seq/s  "
+                  f"{result['peak_rss_mb']:8.1f} MB", file=sys.stderr)
+
+    import torch
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "torch_threads": torch.get_num_threads(),
+            "machine": platform.machine(),
+            "n_sequences": len(sequences)
+        },
+        "results": results
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if baseline:
+        regressions = compare(results, baseline, args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
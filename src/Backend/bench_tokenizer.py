@@ -0,0 +1,67 @@
+"""Microbenchmark: legacy list.index() glycoword lookup vs. the hashed GlycowordTokenizer.
+
+Run from src/Backend:  python bench_tokenizer.py --repeat 5
+"""
+import argparse
+import json
+import time
+
+import pandas as pd
+
+from artifact_cache import DATASET_PATH
+from glycoword_tokenizer import GlycowordTokenizer, sequence_to_glycowords
+
+VOCAB_PATH = "glycoword_vocab.json"
+
+
+def legacy_labels(glycoword_list, libr):
+    # The pre-tokenizer path: linear scan with list comparisons, ValueError on unknown words.
+    return [libr.index(word) for word in glycoword_list]
+
+
+def time_it(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(VOCAB_PATH, 'r') as f:
+        vocab = json.load(f)
+    tokenizer = GlycowordTokenizer(vocab, unknown='skip')
+
+    sequences = pd.read_csv(DATASET_PATH).glycan.dropna().tolist()
+    glycoword_lists = [[list(w) for w in sequence_to_glycowords(s)] for s in sequences]
+    n_words = sum(len(words) for words in glycoword_lists)
+
+    def run_legacy():
+        for words in glycoword_lists:
+            try:
+                legacy_labels(words, vocab)
+            except ValueError:
+                pass
+
+    def run_hashed():
+        for words in glycoword_lists:
+            tokenizer.encode_glycowords(words)
+
+    legacy = time_it(run_legacy, args.repeat)
+    hashed = time_it(run_hashed, args.repeat)
+    batch = time_it(lambda: tokenizer.encode(sequences, padded=True), args.repeat)
+
+    print(f"{len(sequences)} sequences, {n_words} glycowords, vocabulary of {len(vocab)}")
+    print(f"list.index lookup : {legacy * 1e3:9.2f} ms  ({legacy / n_words * 1e9:8.1f} ns/glycoword)")
+    print(f"hashed lookup     : {hashed * 1e3:9.2f} ms  ({hashed / n_words * 1e9:8.1f} ns/glycoword)")
+    print(f"batch encode      : {batch * 1e3:9.2f} ms  (parse + lookup + padding)")
+    print(f"speedup           : {legacy / hashed:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Columnar RDKit descriptor tables for whole glycan libraries.
+
+Each IUPAC sequence is canonicalized and converted to SMILES through the shared conversion
+cache, parsed into an RDKit Mol once, and only the selected descriptors are computed. Chunks run
+in a process pool and come back as one float64 matrix per chunk, so the result is a set of
+columns (input, canonical_iupac, smiles, error, one array per descriptor) rather than a list
+of per-glycan dicts.
+
+Run from src/Backend:
+    python bulk_descriptors.py library.csv descriptors.parquet --format parquet --workers 8
+    python bulk_descriptors.py library.csv descriptors.npz --descriptors "Molecular Weight" TPSA
+    python bulk_descriptors.py library.csv descriptors.csv --benchmark 500   # vs /api/descriptor
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from rdkit import Chem
+from rdkit.Chem import Descriptors
+
+from iupac_cache import canonical_smiles
+
+# Output name -> RDKit function, in the order /api/descriptor reports them.
+DESCRIPTOR_FUNCTIONS = {
+    "Molecular Weight": Descriptors.MolWt,
+    "Exact Molecular Weight": Descriptors.ExactMolWt,
+    "Heavy Atom Count": Descriptors.HeavyAtomCount,
+    "Heavy Atom Mol Weight": Descriptors.HeavyAtomMolWt,
+    "Num Valence Electrons": Descriptors.NumValenceElectrons,
+    "Num Rotatable Bonds": Descriptors.NumRotatableBonds,
+    "H-Bond Acceptors": Descriptors.NumHAcceptors,
+    "H-Bond Donors": Descriptors.NumHDonors,
+    "TPSA": Descriptors.TPSA,
+    "LogP": Descriptors.MolLogP,
+    "Fraction Csp3": Descriptors.FractionCSP3,
+    "Ring Count": Descriptors.RingCount,
+    "Aromatic Rings": Descriptors.NumAromaticRings,
+    "Aliphatic Rings": Descriptors.NumAliphaticRings,
+    "Saturated Rings": Descriptors.NumSaturatedRings,
+    "Num Heteroatoms": Descriptors.NumHeteroatoms,
+    "NHOH Count": Descriptors.NHOHCount,
+    "NO Count": Descriptors.NOCount,
+    "Molar Refractivity": Descriptors.MolMR
+}
+DESCRIPTOR_NAMES = tuple(DESCRIPTOR_FUNCTIONS)
+TEXT_COLUMNS = ("input", "canonical_iupac", "smiles", "error")
+
+
+def descriptor_chunk(sequences, names):
+    """Runs in a pool worker: (canonical, smiles, error) lists plus a (len(sequences), len(names)) matrix."""
+    functions = [DESCRIPTOR_FUNCTIONS[name] for name in names]
+    values = np.full((len(sequences), len(names)), np.nan)
+    canonical, smiles, errors = [], [], []
+    for i, sequence in enumerate(sequences):
+        try:
+            c, s = canonical_smiles(sequence)
+        except Exception as e:
+            canonical.append("")
+            smiles.append("")
+            errors.append(f"Failed to convert IUPAC to SMILES: {str(e)}")
+            continue
+        canonical.append(c)
+        smiles.append(s or "")
+        mol = Chem.MolFromSmiles(s) if s else None
+        if mol is None:
+            errors.append("Invalid SMILES")
+            continue
+        values[i] = [f(mol) for f in functions]
+        errors.append("")
+    return canonical, smiles, errors, values
+
+
+def compute_descriptors(sequences, names=DESCRIPTOR_NAMES, workers=None, chunk_size=256, pool=None):
+    """Returns {column: array} with TEXT_COLUMNS as string arrays and one float64 array per descriptor.
+
+    Failed glycans keep their row, with NaN descriptors and the reason in `error`.
+    """
+    unknown = [n for n in names if n not in DESCRIPTOR_FUNCTIONS]
+    if unknown:
+        raise ValueError(f"Unknown descriptors: {unknown}")
+    sequences = [s.strip() if isinstance(s, str) else "" for s in sequences]
+    chunks = [sequences[i:i + chunk_size] for i in range(0, len(sequences), chunk_size)]
+    work = partial(descriptor_chunk, names=tuple(names))
+    if pool is not None:
+        parts = list(pool.map(work, chunks))
+    elif workers == 1 or len(chunks) <= 1:
+        parts = [work(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            parts = list(pool.map(work, chunks))
+
+    matrix = np.concatenate([p[3] for p in parts]) if parts else np.empty((0, len(names)))
+    columns = {
+        "input": np.asarray(sequences, dtype=str),
+        "canonical_iupac": np.asarray([c for p in parts for c in p[0]], dtype=str),
+        "smiles": np.asarray([s for p in parts for s in p[1]], dtype=str),
+        "error": np.asarray([e for p in parts for e in p[2]], dtype=str)
+    }
+    for j, name in enumerate(names):
+        columns[name] = matrix[:, j]
+    return columns
+
+
+def write_columns(columns, path, fmt):
+    if fmt == "npz":
+        np.savez(path, **columns)
+    elif fmt == "parquet":
+        pd.DataFrame(columns).to_parquet(path, index=False)
+    else:
+        pd.DataFrame(columns).to_csv(path, index=False)
+
+
+def read_sequences(path, column):
+    if path.endswith(".csv"):
+        return pd.read_csv(path, usecols=[column])[column].dropna().tolist()
+    with open(path, "r") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def benchmark(sequences, workers, chunk_size):
+    """seq/s of /api/descriptor (one request per glycan) vs compute_descriptors over the same glycans.
+
+    Conversions are warmed into the shared cache first, so both sides measure descriptors plus
+    their own overhead rather than glycowork.
+    """
+    from flask import Flask
+    from descriptor_api import descriptor_api
+
+    for sequence in sequences:
+        try:
+            canonical_smiles(sequence)
+        except Exception:
+            pass
+    app = Flask(__name__)
+    app.register_blueprint(descriptor_api)
+    client = app.test_client()
+
+    start = time.perf_counter()
+    for sequence in sequences:
+        client.post("/api/descriptor", json={"format": "IUPAC", "data": sequence})
+    per_request = len(sequences) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    compute_descriptors(sequences, workers=workers, chunk_size=chunk_size)
+    bulk = len(sequences) / (time.perf_counter() - start)
+    print(f"/api/descriptor: {per_request:,.1f} seq/s   bulk ({workers} workers): {bulk:,.1f} seq/s   "
+          f"speed-up x{bulk / per_request:.1f}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="CSV file (see --column) or text file with one IUPAC sequence per line")
+    parser.add_argument("output")
+    parser.add_argument("--column", default="glycan", help="CSV column holding IUPAC-condensed sequences")
+    parser.add_argument("--format", choices=["csv", "parquet", "npz"], default="csv")
+    parser.add_argument("--descriptors", nargs="+", default=list(DESCRIPTOR_NAMES), choices=DESCRIPTOR_NAMES)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=256, help="glycans per pool task")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="also compare throughput with /api/descriptor on N glycans")
+    args = parser.parse_args()
+
+    sequences = read_sequences(args.input, args.column)
+    start = time.perf_counter()
+    columns = compute_descriptors(sequences, args.descriptors, args.workers, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    write_columns(columns, args.output, args.format)
+    n_errors = int((columns["error"] != "").sum())
+    print(f"{len(sequences)} glycans ({n_errors} errors) in {elapsed:.1f} s, "
+          f"{len(sequences) / elapsed if elapsed else 0:,.1f} seq/s -> {args.output}", file=sys.stderr)
+
+    if args.benchmark:
+        benchmark(sequences[:args.benchmark], args.workers, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
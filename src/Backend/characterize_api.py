@@ -1,14 +1,13 @@
 from flask import Blueprint, request, jsonify
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import io
 import base64
-from glycowork.motif.analysis import characterize_monosaccharide
+
+from job_queue import async_job
+from render_pool import render_characterization, run_render
 
 characterize_api = Blueprint('characterize_api', __name__)
 
 @characterize_api.route('/api/characterize', methods=['POST'])
+@async_job("characterize", concurrency=2)
 def characterize():
     data = request.get_json()
     sugar = data.get('sugar')
@@ -18,13 +17,8 @@ def characterize():
     thresh = int(data.get('thresh', 10))
 
     try:
-        plt.figure(figsize=(10, 6))
-        characterize_monosaccharide(sugar, rank=rank, focus=focus, modifications=modifications, thresh=thresh)
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png')
-        buf.seek(0)
-        image_base64 = base64.b64encode(buf.read()).decode('utf-8')
-        plt.close()
+        image = run_render(render_characterization, sugar, rank, focus, modifications, thresh)
+        image_base64 = base64.b64encode(image).decode('utf-8')
         return jsonify({'image': image_base64})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
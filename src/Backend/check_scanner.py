@@ -0,0 +1,89 @@
+"""Behaviour check for glycan_scanner against the tokenizer copies it replaced.
+
+Over every glycan in dataset/merged_glycan_dataset.csv, the scan-based motif_find,
+process_glycans and small_motif_find must match the old motif_api, model_api and
+generate_vocab implementations, and glycowords_batch must rebuild glycoword_vocab.json exactly.
+Exits 1 on any mismatch. bench_suite.py runs these checks before timing anything.
+
+Run from src/Backend:  python check_scanner.py
+"""
+import csv
+import json
+import sys
+
+from artifact_cache import DATASET_PATH
+from glycan_scanner import glycowords_batch, motif_find, process_glycans, scan, small_motif_find
+
+VOCAB_PATH = "glycoword_vocab.json"
+
+
+# ============================ Previous copies ==============================
+
+def legacy_motif_api(s):
+    b = [k.replace('[', '').replace(']', '') for k in sum([i.split(')') for i in s.split('(')], [])]
+    return ['*'.join(b[i:i+5]) for i in range(0, len(b)-4, 2)]
+
+
+def legacy_model_api(s):
+    b = s.split('(')
+    b = [k.split(')') for k in b]
+    b = [item for sublist in b for item in sublist]
+    b = [k.strip('[]') for k in b]
+    return ['*'.join(b[i:i+5]) for i in range(0, len(b)-4, 2)]
+
+
+def legacy_generate_vocab(s):
+    b = s.split('(')
+    b = [k.split(')') for k in b]
+    b = [item for sublist in b for item in sublist]
+    b = [k.strip('[') for k in b]
+    b = [k.strip(']') for k in b]
+    b = [k.replace('[', '') for k in b]
+    b = [k.replace(']', '') for k in b]
+    return ['*'.join(b[i:i+5]) for i in range(0, len(b)-4, 2)]
+
+
+# ================================ Checks ===================================
+
+def check_equivalence(sequences):
+    """Returns the sequences on which scan-based motif_find/process_glycans differ from any previous copy."""
+    mismatches = []
+    for s in sequences:
+        expected = legacy_motif_api(s)
+        legacy_words = [m.split('*') for m in expected]
+        if (motif_find(s) != expected or legacy_model_api(s) != expected or legacy_generate_vocab(s) != expected
+                or process_glycans([s]) != legacy_words or small_motif_find(s) != '*'.join(scan(s))):
+            mismatches.append(s)
+    return mismatches
+
+
+def check_vocab(labeled_sequences, vocab):
+    """True if generate_vocab.py's procedure over the scanner reproduces the committed vocabulary."""
+    words = {tuple(w) for ws in glycowords_batch(labeled_sequences) for w in ws}
+    return [list(k) for k in sorted(words)] == vocab
+
+
+def read_dataset(path=DATASET_PATH):
+    with open(path, newline='') as f:
+        rows = [row for row in csv.DictReader(f) if row["glycan"]]
+    # generate_vocab.py builds the vocabulary from labeled rows only.
+    return [row["glycan"] for row in rows], [row["glycan"] for row in rows if row["label"]]
+
+
+def run_checks(out=sys.stderr):
+    """Runs every check, reporting to `out`; returns True if all pass."""
+    sequences, labeled = read_dataset()
+    mismatches = check_equivalence(sequences)
+    for s in mismatches[:20]:
+        print(f"MISMATCH {s}", file=out)
+    print(f"{len(sequences) - len(mismatches)}/{len(sequences)} sequences tokenize identically.", file=out)
+
+    with open(VOCAB_PATH, 'r') as f:
+        vocab = json.load(f)
+    vocab_ok = check_vocab(labeled, vocab)
+    print(f"{VOCAB_PATH} ({len(vocab)} glycowords) {'reproduced' if vocab_ok else 'NOT reproduced'}.", file=out)
+    return not mismatches and vocab_ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run_checks(sys.stdout) else 1)
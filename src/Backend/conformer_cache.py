@@ -0,0 +1,202 @@
+"""Persistent 3D conformers for /visualize, keyed by canonical IUPAC.
+
+Embedding is deterministic (fixed seed), so a MolBlock computed once is stored in a SQLite table
+under cache/ and served to every worker afterwards; deterministic failures are stored too, while
+timeouts and crashed (e.g. OOM-killed) embedding processes are not. A
+miss embeds ETKDGv3 conformers on all cores (EmbedMultipleConfs/MMFFOptimizeMoleculeConfs with
+numThreads=0) and keeps the lowest-energy one. The work runs in a child process that is
+terminated when the time budget runs out, so a huge glycan cannot pin a web worker.
+
+Pre-embed the reference corpus from src/Backend:
+    python conformer_cache.py --jobs 4 --budget 600
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import rdkit
+from rdkit import Chem
+from rdkit.Chem import AllChem
+
+from artifact_cache import SQLiteConnections
+
+CONFORMER_CACHE_FILE = "conformers.sqlite"
+CONFORMER_SEED = 0xf00d
+# Conformers embedded per miss (in parallel); the lowest MMFF energy one is kept.
+CONFORMER_ATTEMPTS = int(os.environ.get("CONFORMER_ATTEMPTS", 4))
+CONFORMERS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conformers (
+    canonical TEXT NOT NULL, version TEXT NOT NULL, mol_block TEXT, error TEXT, seconds REAL,
+    PRIMARY KEY (canonical, version)
+);
+"""
+
+
+class EmbeddingError(Exception):
+    pass
+
+
+class EmbeddingTimeout(EmbeddingError):
+    pass
+
+
+class EmbeddingCrashed(EmbeddingError):
+    pass
+
+
+def embed_mol_block(smiles, n_confs=CONFORMER_ATTEMPTS, threads=0):
+    mol = Chem.MolFromSmiles(smiles)
+    if mol is None:
+        raise EmbeddingError("Invalid SMILES")
+    mol = Chem.AddHs(mol)
+    params = AllChem.ETKDGv3()
+    params.randomSeed = CONFORMER_SEED
+    params.numThreads = threads
+    conf_ids = list(AllChem.EmbedMultipleConfs(mol, numConfs=n_confs, params=params))
+    if not conf_ids:
+        raise EmbeddingError("3D embedding failed")
+    # (status, energy) per conformer; status -1 means MMFF could not be set up for it.
+    results = AllChem.MMFFOptimizeMoleculeConfs(mol, numThreads=threads)
+    optimized = [i for i, (status, _) in enumerate(results) if status != -1]
+    best = min(optimized, key=lambda i: results[i][1]) if optimized else 0
+    return Chem.MolToMolBlock(mol, confId=conf_ids[best])
+
+
+def _embed_child(smiles, conn, n_confs, threads):
+    try:
+        conn.send(("ok", embed_mol_block(smiles, n_confs, threads)))
+    except Exception as e:
+        conn.send(("error", str(e)))
+    finally:
+        conn.close()
+
+
+_context = None
+
+
+def _mp_context():
+    # forkserver children start from a clean process with RDKit already imported, which is fast
+    # and safe from a threaded server; spawn where forkserver is unavailable.
+    global _context
+    if _context is None:
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            _context = multiprocessing.get_context("forkserver")
+            _context.set_forkserver_preload(["conformer_cache"])
+        else:
+            _context = multiprocessing.get_context("spawn")
+    return _context
+
+
+def embed_with_budget(smiles, budget, n_confs=CONFORMER_ATTEMPTS, threads=0):
+    """MolBlock of `smiles`; EmbeddingTimeout past `budget` seconds, EmbeddingCrashed if the child dies."""
+    ctx = _mp_context()
+    receiver, sender = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_embed_child, args=(smiles, sender, n_confs, threads), daemon=True)
+    process.start()
+    sender.close()
+    try:
+        if not receiver.poll(budget):
+            raise EmbeddingTimeout(f"3D embedding did not finish within {budget:g} s")
+        status, payload = receiver.recv()
+    except EOFError:
+        process.join()
+        raise EmbeddingCrashed(f"3D embedding process exited unexpectedly (exit code {process.exitcode})")
+    finally:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+        receiver.close()
+    if status != "ok":
+        raise EmbeddingError(payload)
+    return payload
+
+
+class ConformerStore:
+    def __init__(self, name=CONFORMER_CACHE_FILE, n_confs=CONFORMER_ATTEMPTS):
+        self.name = name
+        self.n_confs = n_confs
+        self.version = f"rdkit{rdkit.__version__}-etkdgv3-seed{CONFORMER_SEED}-confs{n_confs}"
+        self._connection = SQLiteConnections(name, CONFORMERS_SCHEMA).get
+
+    def get(self, canonical):
+        """(mol_block, error) stored for a canonical IUPAC, or None if it was never embedded."""
+        row = self._connection().execute(
+            "SELECT mol_block, error FROM conformers WHERE canonical = ? AND version = ?",
+            (canonical, self.version)).fetchone()
+        return None if row is None else (row[0], row[1])
+
+    def set(self, canonical, mol_block, error=None, seconds=None):
+        conn = self._connection()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO conformers (canonical, version, mol_block, error, seconds) "
+                         "VALUES (?, ?, ?, ?, ?)", (canonical, self.version, mol_block, error, seconds))
+
+    def get_or_embed(self, canonical, smiles, budget, threads=0):
+        """Cached MolBlock, else embeds within `budget` and stores the outcome.
+
+        Raises EmbeddingError (stored, it would fail again), or EmbeddingTimeout or EmbeddingCrashed
+        (not stored; the next request tries again).
+        """
+        cached = self.get(canonical)
+        if cached is None:
+            start = time.perf_counter()
+            try:
+                mol_block = embed_with_budget(smiles, budget, self.n_confs, threads)
+            except (EmbeddingTimeout, EmbeddingCrashed):
+                raise
+            except EmbeddingError as e:
+                self.set(canonical, None, str(e), time.perf_counter() - start)
+                raise
+            self.set(canonical, mol_block, None, time.perf_counter() - start)
+            return mol_block
+        mol_block, error = cached
+        if error:
+            raise EmbeddingError(error)
+        return mol_block
+
+
+CONFORMERS = ConformerStore()
+
+
+def main():
+    from descriptor_table import corpus_sequences
+    from iupac_cache import canonical_smiles
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=max(1, (os.cpu_count() or 1) // 4), help="glycans embedded at once")
+    parser.add_argument("--threads", type=int, default=4, help="embedding threads per glycan")
+    parser.add_argument("--budget", type=float, default=600.0, help="seconds allowed per glycan")
+    parser.add_argument("--no-glycowork", action="store_true", help="only embed merged_glycan_dataset.csv")
+    args = parser.parse_args()
+
+    sequences = corpus_sequences(include_glycowork=not args.no_glycowork)
+    counts = {"embedded": 0, "cached": 0, "failed": 0, "timed_out": 0, "crashed": 0}
+    lock = threading.Lock()
+
+    def embed(sequence):
+        try:
+            canonical, smiles = canonical_smiles(sequence)
+            outcome = "cached" if CONFORMERS.get(canonical) is not None else "embedded"
+            CONFORMERS.get_or_embed(canonical, smiles, args.budget, args.threads)
+        except EmbeddingTimeout:
+            outcome = "timed_out"
+        except EmbeddingCrashed:
+            outcome = "crashed"
+        except Exception:
+            outcome = "failed"
+        with lock:
+            counts[outcome] += 1
+            done = sum(counts.values())
+            if done % 100 == 0 or done == len(sequences):
+                print(f"{done}/{len(sequences)} {counts}", file=sys.stderr)
+
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        list(pool.map(embed, sequences))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
-from flask import Blueprint, request, jsonify
-from glycowork.motif.processing import canonicalize_iupac, IUPAC_to_SMILES
-from glypy.io import iupac, glycoct, wurcs
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+import json
 import logging  # Import logging to fix the error
+import os
+
+from batch_convert import INPUT_FORMATS, OUTPUT_FORMATS, convert_batch, convert_record, split_records
+from iupac_cache import CONVERSIONS
 
 # Initialize Blueprint
 convert_api = Blueprint('convert_api', __name__)
@@ -9,9 +12,8 @@ convert_api = Blueprint('convert_api', __name__)
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
-# Loaders and dumpers for different formats
-LOADERS = {'glycoct': glycoct.loads, 'wurcs': wurcs.loads, 'iupac': None}
-DUMPERS = {'glycoct': glycoct.dumps, 'wurcs': wurcs.dumps, 'iupac': iupac.dumps}
+# Largest number of records accepted by one /convert/batch request.
+MAX_CONVERT_RECORDS = int(os.environ.get('MAX_CONVERT_RECORDS', 20000))
 
 @convert_api.route('/convert', methods=['POST'])
 def convert():
@@ -21,41 +23,68 @@ def convert():
 
     if not glycan_seq:
         return jsonify({'error': 'Glycan sequence is empty.'}), 400
+    if input_fmt not in INPUT_FORMATS:
+        return jsonify({'error': f'Unsupported input format: {input_fmt}'}), 400
 
     try:
-        if input_fmt == 'iupac':
-            # Convert IUPAC to canonical form and SMILES
-            canonical = canonicalize_iupac(glycan_seq)
-            smiles_list = IUPAC_to_SMILES([canonical])
-            return jsonify({
-                'iupac': canonical,
-                'smiles': smiles_list[0],
-                'glycoct': 'Conversion from IUPAC to GlycoCT not supported.',
-                'wurcs': 'Conversion from IUPAC to WURCS not supported.'
-            })
-
-        elif input_fmt in ['glycoct', 'wurcs']:
-            # Convert GlycoCT or WURCS to IUPAC, GlycoCT, WURCS, SMILES
-            structure = LOADERS[input_fmt](glycan_seq)
-            iupac_str = iupac.dumps(structure)
-            glycoct_str = glycoct.dumps(structure)
-            wurcs_str = wurcs.dumps(structure)
-            try:
-                canonical_iupac = canonicalize_iupac(iupac_str)
-                smiles_list = IUPAC_to_SMILES([canonical_iupac])
-                smiles_str = smiles_list[0]
-            except Exception as e:
-                smiles_str = f'SMILES conversion failed: {str(e)}'
-            return jsonify({
-                'iupac': iupac_str,
-                'glycoct': glycoct_str,
-                'wurcs': wurcs_str,
-                'smiles': smiles_str
-            })
-
-        else:
-            return jsonify({'error': f'Unsupported input format: {input_fmt}'}), 400
-
+        return jsonify(convert_record(glycan_seq, input_fmt))
     except Exception as e:
         logging.exception("Conversion error:")
-        return jsonify({'error': f'Conversion failed: {str(e)}'}), 500
\ No newline at end of file
+        return jsonify({'error': f'Conversion failed: {str(e)}'}), 500
+
+@convert_api.route('/convert/batch', methods=['POST'])
+def convert_many():
+    """Converts many records in a process pool and streams one NDJSON line per record, in order.
+
+    Records come from a JSON body ({"records": [...], "input_format": "auto", "outputs": [...]},
+    where a record is a string or {"glycan", "input_format"}) or from an uploaded `file`
+    (multipart; GlycoCT blocks and/or one IUPAC/WURCS record per line) with the same fields as
+    form values. A record that fails gets an "error" instead of outputs; the last line summarizes.
+    """
+    if 'file' in request.files:
+        form = request.form
+        input_fmt = form.get('input_format', 'auto').lower()
+        outputs = form.getlist('outputs') or list(OUTPUT_FORMATS)
+        text = request.files['file'].read().decode('utf-8', errors='replace')
+        records = [(r, input_fmt) for r in split_records(text, input_fmt)]
+    else:
+        data = request.json or {}
+        input_fmt = str(data.get('input_format', 'auto')).lower()
+        outputs = data.get('outputs') or list(OUTPUT_FORMATS)
+        raw_records = data.get('records', [])
+        if not isinstance(raw_records, list):
+            return jsonify({'error': 'records must be a list of strings.'}), 400
+        records = []
+        for record in raw_records:
+            if isinstance(record, dict):
+                glycan, record_fmt = record.get('glycan'), record.get('input_format', input_fmt)
+                if not isinstance(glycan, str) or not isinstance(record_fmt, str):
+                    return jsonify({'error': 'A record object needs a string glycan and input_format.'}), 400
+                records.append((glycan, record_fmt.lower()))
+            elif isinstance(record, str):
+                records.append((record, input_fmt))
+            else:
+                return jsonify({'error': 'records must be a list of strings.'}), 400
+
+    if input_fmt != 'auto' and input_fmt not in INPUT_FORMATS:
+        return jsonify({'error': f'Unsupported input format: {input_fmt}'}), 400
+    if not isinstance(outputs, list) or not set(outputs) <= set(OUTPUT_FORMATS):
+        return jsonify({'error': f'outputs must be a subset of {list(OUTPUT_FORMATS)}'}), 400
+    if not records:
+        return jsonify({'error': 'No records provided.'}), 400
+    if len(records) > MAX_CONVERT_RECORDS:
+        return jsonify({'error': f'At most {MAX_CONVERT_RECORDS} records per batch.'}), 400
+
+    def lines():
+        n_errors = 0
+        for result in convert_batch(records, tuple(outputs)):
+            n_errors += 'error' in result
+            yield json.dumps(result) + '\n'
+        yield json.dumps({'n_records': len(records), 'n_errors': n_errors}) + '\n'
+
+    return Response(stream_with_context(lines()), mimetype='application/x-ndjson')
+
+@convert_api.route('/convert/cache', methods=['GET'])
+def conversion_cache_stats():
+    """Hit rates of the shared canonical IUPAC/SMILES cache (in-process LRU and SQLite tiers)."""
+    return jsonify(CONVERSIONS.stats())
@@ -1,10 +1,42 @@
 from flask import Blueprint, request, jsonify
-from glycowork.motif.processing import canonicalize_iupac, IUPAC_to_SMILES
 from rdkit import Chem
-from rdkit.Chem import Descriptors
+import os
+import time
+
+from bulk_descriptors import DESCRIPTOR_FUNCTIONS
+from iupac_cache import canonical_smiles
+from lazy_loading import LazyResource
 
 descriptor_api = Blueprint('descriptor_api', __name__)
 
+def _load_descriptor_table():
+    from descriptor_table import DescriptorTable
+    return DescriptorTable.load()
+
+# Precomputed corpus descriptors, built by `python descriptor_table.py`. Loading fails until then
+# and, since LazyResource does not keep failures, is retried: at most every DESCRIPTOR_TABLE_RECHECK
+# seconds, so a table built while the server runs is picked up without a restart. Not warmed up,
+# so an unbuilt table is not reported as a failure at startup.
+DESCRIPTOR_TABLE = LazyResource("corpus descriptor table", _load_descriptor_table, warm=False)
+DESCRIPTOR_TABLE_RECHECK = float(os.environ.get("DESCRIPTOR_TABLE_RECHECK", 60))
+_next_table_check = 0.0
+# /api/descriptor/range returns at most MAX_RANGE_RESULTS glycans (the total count is always reported).
+MAX_RANGE_RESULTS = 1000
+
+def descriptor_table():
+    """The corpus descriptor table, or None while it has not been built."""
+    global _next_table_check
+    if DESCRIPTOR_TABLE.loaded:
+        return DESCRIPTOR_TABLE.get()
+    if time.monotonic() < _next_table_check:
+        return None
+    from descriptor_table import TableNotBuilt
+    try:
+        return DESCRIPTOR_TABLE.get()
+    except TableNotBuilt:
+        _next_table_check = time.monotonic() + DESCRIPTOR_TABLE_RECHECK
+        return None
+
 def calculate_descriptors(smiles):
     mol = Chem.MolFromSmiles(smiles)
     if not mol:
@@ -12,25 +44,7 @@ def calculate_descriptors(smiles):
 
     return {
         "SMILES": smiles,
-        "Molecular Weight": Descriptors.MolWt(mol),
-        "Exact Molecular Weight": Descriptors.ExactMolWt(mol),
-        "Heavy Atom Count": Descriptors.HeavyAtomCount(mol),
-        "Heavy Atom Mol Weight": Descriptors.HeavyAtomMolWt(mol),
-        "Num Valence Electrons": Descriptors.NumValenceElectrons(mol),
-        "Num Rotatable Bonds": Descriptors.NumRotatableBonds(mol),
-        "H-Bond Acceptors": Descriptors.NumHAcceptors(mol),
-        "H-Bond Donors": Descriptors.NumHDonors(mol),
-        "TPSA": Descriptors.TPSA(mol),
-        "LogP": Descriptors.MolLogP(mol),
-        "Fraction Csp3": Descriptors.FractionCSP3(mol),
-        "Ring Count": Descriptors.RingCount(mol),
-        "Aromatic Rings": Descriptors.NumAromaticRings(mol),
-        "Aliphatic Rings": Descriptors.NumAliphaticRings(mol),
-        "Saturated Rings": Descriptors.NumSaturatedRings(mol),
-        "Num Heteroatoms": Descriptors.NumHeteroatoms(mol),
-        "NHOH Count": Descriptors.NHOHCount(mol),
-        "NO Count": Descriptors.NOCount(mol),
-        "Molar Refractivity": Descriptors.MolMR(mol)
+        **{name: f(mol) for name, f in DESCRIPTOR_FUNCTIONS.items()}
     }
 
 @descriptor_api.route("/api/descriptor", methods=["POST"])
@@ -46,14 +60,19 @@ def analyze():
     if not iupac:
         return jsonify({"error": "Empty IUPAC input"}), 400
 
+    # Corpus glycans are answered from the precomputed table, by their raw spelling or canonical form.
+    table = descriptor_table()
+    if table is not None and table.row(iupac) is not None:
+        return jsonify(table.describe(table.row(iupac)))
+
     try:
-        canonical_iupac = canonicalize_iupac(iupac)
-        smiles_list = IUPAC_to_SMILES([canonical_iupac])
-        if not smiles_list or len(smiles_list) == 0:
-            return jsonify({"error": "Conversion returned empty list"}), 400
-        smiles = smiles_list[0]
+        canonical_iupac, smiles = canonical_smiles(iupac)
+        if not smiles:
+            return jsonify({"error": "Conversion returned empty SMILES"}), 400
     except Exception as e:
         return jsonify({"error": f"Failed to convert IUPAC to SMILES: {str(e)}"}), 400
+    if table is not None and table.row(canonical_iupac) is not None:
+        return jsonify(table.describe(table.row(canonical_iupac)))
 
     descriptors = calculate_descriptors(smiles)
     if "error" in descriptors:
@@ -63,3 +82,32 @@ def analyze():
         "IUPAC": canonical_iupac,
         **descriptors
     })
+
+@descriptor_api.route("/api/descriptor/range", methods=["POST"])
+def descriptor_range():
+    """Corpus glycans whose descriptor lies in [min, max], ordered by that descriptor."""
+    data = request.get_json()
+    table = descriptor_table()
+    if table is None:
+        return jsonify({"error": "Descriptor table not built. Run python descriptor_table.py."}), 503
+    descriptor = data.get("descriptor")
+    if descriptor not in table.column:
+        return jsonify({"error": f"descriptor must be one of {table.descriptors}"}), 400
+    try:
+        low = float(data.get("min", "-inf"))
+        high = float(data.get("max", "inf"))
+        limit = min(max(int(data.get("limit", 100)), 0), MAX_RANGE_RESULTS)
+    except (TypeError, ValueError):
+        return jsonify({"error": "min and max must be numbers and limit an integer"}), 400
+
+    rows = table.range(descriptor, low, high)
+    j = table.column[descriptor]
+    return jsonify({
+        "descriptor": descriptor,
+        "count": int(len(rows)),
+        "glycans": [{
+            "IUPAC": table.canonical[i],
+            "SMILES": table.smiles[i],
+            descriptor: float(table.values[i, j])
+        } for i in rows[:limit].tolist()]
+    })
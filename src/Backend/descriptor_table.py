@@ -0,0 +1,141 @@
+"""Precomputed RDKit descriptors of the reference corpus, looked up by canonical IUPAC.
+
+An offline build runs bulk_descriptors over every glycan in merged_glycan_dataset.csv and the
+glycowork glycan library, and stores the descriptors as one column-major float64 matrix plus,
+per descriptor, the column sorted ascending with its row permutation (for range queries by
+binary search). All three are .npy files memory-mapped on load; a JSON sidecar holds the
+canonical IUPAC, SMILES and raw input aliases of every row. Artifacts are named by the dataset
+digest and the glycowork and RDKit versions, so an upgrade simply misses until rebuilt.
+
+Build from src/Backend:  python descriptor_table.py --workers 8
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import rdkit
+
+from artifact_cache import DATASET_PATH, atomic_write, cache_path, file_sha256, save_npy_atomic
+from bulk_descriptors import DESCRIPTOR_NAMES, compute_descriptors
+from iupac_cache import glycowork_version
+
+# RDKit returns ints for these; the float64 table converts them back on lookup.
+INTEGER_DESCRIPTORS = {
+    "Heavy Atom Count", "Num Valence Electrons", "Num Rotatable Bonds", "H-Bond Acceptors", "H-Bond Donors",
+    "Ring Count", "Aromatic Rings", "Aliphatic Rings", "Saturated Rings", "Num Heteroatoms", "NHOH Count", "NO Count"
+}
+
+
+def _artifact_paths():
+    digest = f"{file_sha256(DATASET_PATH)[:12]}-gw{glycowork_version()}-rdkit{rdkit.__version__}"
+    return tuple(cache_path(f"descriptor_table.{digest}.{part}")
+                 for part in ("values.npy", "sorted.npy", "order.npy", "json"))
+
+
+class TableNotBuilt(FileNotFoundError):
+    pass
+
+
+def corpus_sequences(include_glycowork=True):
+    sequences = pd.read_csv(DATASET_PATH).glycan.dropna().str.strip().tolist()
+    if include_glycowork:
+        from glycowork.glycan_data.loader import df_glycan
+        sequences += df_glycan.glycan.dropna().str.strip().tolist()
+    return list(dict.fromkeys(s for s in sequences if s))
+
+
+def build_descriptor_table(paths, include_glycowork=True, workers=None):
+    values_path, sorted_path, order_path, meta_path = paths
+    sequences = corpus_sequences(include_glycowork)
+    columns = compute_descriptors(sequences, DESCRIPTOR_NAMES, workers=workers)
+
+    rows, aliases = {}, {}
+    for i, (raw, canonical, error) in enumerate(zip(columns["input"], columns["canonical_iupac"], columns["error"])):
+        if error:
+            continue
+        row = rows.setdefault(canonical, i)
+        aliases[raw] = row
+    keep = sorted(set(rows.values()))
+    position = {old: new for new, old in enumerate(keep)}
+
+    values = np.asfortranarray(np.column_stack([columns[name][keep] for name in DESCRIPTOR_NAMES]))
+    order = np.asfortranarray(np.argsort(values, axis=0, kind="stable").astype(np.int32))
+    sorted_values = np.asfortranarray(np.take_along_axis(values, order, axis=0))
+
+    def write_meta(path):
+        with open(path, 'w') as f:
+            json.dump({
+                "descriptors": list(DESCRIPTOR_NAMES),
+                "canonical": [str(columns["canonical_iupac"][i]) for i in keep],
+                "smiles": [str(columns["smiles"][i]) for i in keep],
+                "aliases": {raw: position[row] for raw, row in aliases.items() if raw != columns["canonical_iupac"][row]}
+            }, f)
+
+    save_npy_atomic(values_path, values)
+    save_npy_atomic(sorted_path, sorted_values)
+    save_npy_atomic(order_path, order)
+    atomic_write(meta_path, write_meta)
+    print(f"Stored descriptors of {len(keep)} glycans ({len(sequences) - len(aliases)} failed) in {values_path}.")
+
+
+class DescriptorTable:
+    def __init__(self, values, sorted_values, order, descriptors, canonical, smiles, aliases):
+        self.values = values
+        self.sorted_values = sorted_values
+        self.order = order
+        self.descriptors = descriptors
+        self.column = {name: j for j, name in enumerate(descriptors)}
+        self.canonical = canonical
+        self.smiles = smiles
+        self.index = {key: i for i, key in enumerate(canonical)}
+        self.index.update(aliases)
+
+    @classmethod
+    def load(cls):
+        """The table for the current dataset and library versions; TableNotBuilt if it has not been built."""
+        paths = _artifact_paths()
+        if not all(os.path.exists(p) for p in paths):
+            raise TableNotBuilt("Descriptor table not built; /api/descriptor computes every request live "
+                                "(python descriptor_table.py).")
+        values_path, sorted_path, order_path, meta_path = paths
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        return cls(np.load(values_path, mmap_mode='r'), np.load(sorted_path, mmap_mode='r'),
+                   np.load(order_path, mmap_mode='r'), meta["descriptors"], meta["canonical"], meta["smiles"],
+                   meta["aliases"])
+
+    def __len__(self):
+        return len(self.canonical)
+
+    def row(self, key):
+        """Row of a canonical IUPAC (or a raw corpus spelling of it), or None."""
+        return self.index.get(key)
+
+    def describe(self, row):
+        descriptors = {
+            name: int(v) if name in INTEGER_DESCRIPTORS else float(v)
+            for name, v in zip(self.descriptors, self.values[row].tolist())
+        }
+        return {"IUPAC": self.canonical[row], "SMILES": self.smiles[row], **descriptors}
+
+    def range(self, descriptor, low=-np.inf, high=np.inf):
+        """Rows with low <= descriptor <= high, ordered by the descriptor value."""
+        j = self.column[descriptor]
+        column = self.sorted_values[:, j]
+        start = np.searchsorted(column, low, side='left')
+        stop = np.searchsorted(column, high, side='right')
+        return self.order[start:stop, j]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--no-glycowork", action="store_true", help="only index merged_glycan_dataset.csv")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    build_descriptor_table(_artifact_paths(), include_glycowork=not args.no_glycowork, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,132 @@
-from flask import Blueprint, request, jsonify
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
-import io
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 import base64
-import warnings
-from glycowork.motif.draw import GlycoDraw
+import os
 
-# Suppress interactive backend warning
-warnings.filterwarnings("ignore", message=".*FigureCanvasAgg is non-interactive.*")
+from render_cache import RENDER_FORMATS, RENDERS
+from render_pool import cached_render, render_batch, sprite_sheet, stream_zip
 
 draw_api = Blueprint('draw_api', __name__)
 
+# Largest number of glycans accepted by one /api/draw/batch request.
+MAX_DRAW_BATCH = int(os.environ.get('MAX_DRAW_BATCH', 1000))
+
+def image_response(key, fmt, data):
+    response = Response(data, mimetype=RENDER_FORMATS[fmt])
+    response.set_etag(key)
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+    return response
+
+def not_modified(key):
+    response = Response(status=304)
+    response.set_etag(key)
+    return response
+
+def preferred_image_type():
+    """The image type the Accept header names and ranks above application/json, or None.
+
+    Browsers send Accept: */* by default, which ranks every type equally and so keeps JSON.
+    """
+    accept = request.accept_mimetypes
+    json_quality = accept.quality('application/json')
+    ranked = [(q, mimetype) for mimetype, q in accept if mimetype in RENDER_FORMATS.values() and q > json_quality]
+    return max(ranked)[1] if ranked else None
+
 @draw_api.route('/api/draw', methods=['POST'])
 def draw_glycan():
+    """Renders a glycan as base64 JSON (default) or as raw image bytes.
+
+    format: "png" (default) or "svg". Raw bytes are returned for response="binary" or when the
+    Accept header names image/png or image/svg+xml with a higher quality than application/json.
+    Both carry an ETag (distinct per representation); a matching If-None-Match gets 304 without
+    rendering.
+    """
     data = request.get_json()
     glycan = data.get('glycan', '').strip()
     motif = data.get('highlight_motif', None)
+    accepted = preferred_image_type()
+    binary = data.get('response') == 'binary' or accepted is not None
+    fmt = data.get('format') or ('svg' if accepted == 'image/svg+xml' else 'png')
 
     if not glycan:
         return jsonify({'error': 'No glycan sequence provided.'}), 400
+    if fmt not in RENDER_FORMATS:
+        return jsonify({'error': f'format must be one of {sorted(RENDER_FORMATS)}'}), 400
 
     try:
-        GlycoDraw(draw_this=glycan, highlight_motif=motif)
-        fig = plt.gcf()
-        buf = io.BytesIO()
-        fig.savefig(buf, format='png', bbox_inches='tight')
-        plt.close(fig)
-
-        buf.seek(0)
-        encoded_img = base64.b64encode(buf.read()).decode('utf-8')
-        return jsonify({'image': encoded_img})
+        key, render = cached_render(glycan, motif, fmt)
+        etag = key if binary else f'{key}-json'
+        if request.if_none_match.contains(etag):
+            return not_modified(etag)
+        image = render()
     except Exception as e:
         return jsonify({'error': f'Failed to draw glycan. Details: {str(e)}'}), 500
+
+    if binary:
+        return image_response(key, fmt, image)
+    response = jsonify({'image': base64.b64encode(image).decode('utf-8'), 'format': fmt})
+    response.set_etag(etag)
+    return response
+
+@draw_api.route('/api/draw.<fmt>', methods=['GET'])
+def draw_glycan_image(fmt):
+    """GET /api/draw.png?glycan=...&highlight_motif=... for <img> tags and HTTP caches."""
+    glycan = request.args.get('glycan', '').strip()
+    motif = request.args.get('highlight_motif') or None
+    if not glycan:
+        return jsonify({'error': 'No glycan sequence provided.'}), 400
+    if fmt not in RENDER_FORMATS:
+        return jsonify({'error': f'format must be one of {sorted(RENDER_FORMATS)}'}), 404
+
+    try:
+        key, render = cached_render(glycan, motif, fmt)
+        if request.if_none_match.contains(key):
+            return not_modified(key)
+        return image_response(key, fmt, render())
+    except Exception as e:
+        return jsonify({'error': f'Failed to draw glycan. Details: {str(e)}'}), 500
+
+@draw_api.route('/api/draw/cache', methods=['GET'])
+def render_cache_stats():
+    return jsonify(RENDERS.stats())
+
+@draw_api.route('/api/draw/batch', methods=['POST'])
+def draw_batch():
+    """Renders many glycans in the render process pool.
+
+    glycans: strings or {"glycan", "highlight_motif"} objects (highlight_motif at the top level
+    applies to plain strings). output="zip" (default) streams a zip of <index>.<format> files plus
+    index.json; output="sprite" returns one PNG sheet (base64) with each glycan's box in "index".
+    """
+    data = request.get_json()
+    default_motif = data.get('highlight_motif')
+    fmt = data.get('format', 'png')
+    output = data.get('output', 'zip')
+    items = []
+    for entry in data.get('glycans', []):
+        if isinstance(entry, dict):
+            items.append((str(entry.get('glycan', '')).strip(), entry.get('highlight_motif', default_motif)))
+        else:
+            items.append((str(entry).strip(), default_motif))
+
+    if not items or not all(glycan for glycan, _ in items):
+        return jsonify({'error': 'glycans must be a non-empty list of glycan sequences.'}), 400
+    if len(items) > MAX_DRAW_BATCH:
+        return jsonify({'error': f'At most {MAX_DRAW_BATCH} glycans per batch.'}), 400
+    if fmt not in RENDER_FORMATS:
+        return jsonify({'error': f'format must be one of {sorted(RENDER_FORMATS)}'}), 400
+    if output not in ('zip', 'sprite'):
+        return jsonify({'error': 'output must be "zip" or "sprite"'}), 400
+
+    if output == 'sprite':
+        if fmt != 'png':
+            return jsonify({'error': 'Sprite sheets are PNG only.'}), 400
+        sheet, index = sprite_sheet(items, render_batch(items, 'png'))
+        return jsonify({
+            'sprite': base64.b64encode(sheet).decode('utf-8') if sheet is not None else None,
+            'index': index
+        })
+
+    response = Response(stream_with_context(stream_zip(items, render_batch(items, fmt), fmt)), mimetype='application/zip')
+    response.headers['Content-Disposition'] = f'attachment; filename="glycans_{fmt}.zip"'
+    return response
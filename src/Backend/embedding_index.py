@@ -0,0 +1,92 @@
+"""Precomputed MPNN embeddings of the reference corpus for nearest-neighbour glycan search.
+
+Every scorable glycan in merged_glycan_dataset.csv is embedded once (the pooled representation
+right after global_mean_pool), L2-normalized and stored as a float32 .npy that is memory-mapped
+on load. Artifacts are named by the dataset and checkpoint digests plus the inference backend,
+so they are rebuilt automatically when any of them changes.
+
+Build ahead of time from src/Backend:  python embedding_index.py
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from artifact_cache import DATASET_PATH, atomic_write, cache_path, file_sha256, save_npy_atomic
+
+EMBED_BATCH_SIZE = 512
+
+
+def _artifact_paths(runtime):
+    digest = f"{file_sha256(DATASET_PATH)[:12]}-{file_sha256(runtime.model_path)[:12]}-{runtime.backend}"
+    return cache_path(f"glycan_embeddings.{digest}.npy"), cache_path(f"glycan_embeddings.{digest}.json")
+
+
+def build_embedding_index(runtime, tokenizer, process_glycans, matrix_path, meta_path):
+    df = pd.read_csv(DATASET_PATH).dropna(subset=["glycan"])
+    glycans, glycan_ids, labels, token_lists = [], [], [], []
+    for glycan_id, glycan, label in zip(df.glycan_id, df.glycan.str.strip(), df.label):
+        glycowords = process_glycans([glycan])
+        if not glycowords or tokenizer.unknown_glycowords(glycowords):
+            continue
+        glycans.append(glycan)
+        glycan_ids.append(None if pd.isna(glycan_id) else glycan_id)
+        labels.append(None if pd.isna(label) else int(label))
+        token_lists.append(tokenizer.encode_glycowords(glycowords))
+
+    chunks = [runtime.embed_token_lists(token_lists[i:i + EMBED_BATCH_SIZE])
+              for i in range(0, len(token_lists), EMBED_BATCH_SIZE)]
+    matrix = np.concatenate(chunks).astype(np.float32)
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+    def write_meta(path):
+        with open(path, 'w') as f:
+            json.dump({"glycans": glycans, "glycan_ids": glycan_ids, "labels": labels}, f)
+
+    save_npy_atomic(matrix_path, matrix)
+    atomic_write(meta_path, write_meta)
+    print(f"Embedded {len(glycans)} glycans into {matrix_path}.")
+
+
+class EmbeddingIndex:
+    def __init__(self, matrix, glycans, glycan_ids, labels):
+        self.matrix = matrix
+        self.glycans = glycans
+        self.glycan_ids = glycan_ids
+        self.labels = labels
+
+    @classmethod
+    def load(cls, runtime, tokenizer, process_glycans):
+        matrix_path, meta_path = _artifact_paths(runtime)
+        if not (os.path.exists(matrix_path) and os.path.exists(meta_path)):
+            build_embedding_index(runtime, tokenizer, process_glycans, matrix_path, meta_path)
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        return cls(np.load(matrix_path, mmap_mode='r'), meta["glycans"], meta["glycan_ids"], meta["labels"])
+
+    def __len__(self):
+        return len(self.glycans)
+
+    def top_k(self, embedding, k=10):
+        """Cosine top-k: one matrix-vector product over the normalized corpus, then argpartition."""
+        query = np.asarray(embedding, dtype=np.float32).ravel()
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        similarities = self.matrix @ query
+        k = min(k, len(similarities))
+        if k <= 0:
+            return []
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        return [{
+            "glycan": self.glycans[i],
+            "glycan_id": self.glycan_ids[i],
+            "label": self.labels[i],
+            "similarity": float(similarities[i])
+        } for i in top]
+
+
+if __name__ == "__main__":
+    from model_api import RUNTIME, TOKENIZER, process_glycans
+    runtime = RUNTIME.get()
+    build_embedding_index(runtime, TOKENIZER, process_glycans, *_artifact_paths(runtime))
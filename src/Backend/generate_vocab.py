@@ -3,29 +3,12 @@ import json
 import re
 import os
 
-# --- Helper functions copied from MPNN.py ---
-def motif_find(s):
-  """converts a IUPACcondensed-ish glycan into a list of overlapping, asterisk-separated glycowords"""
-  b = s.split('(')
-  b = [k.split(')') for k in b]
-  b = [item for sublist in b for item in sublist]
-  b = [k.strip('[') for k in b]
-  b = [k.strip(']') for k in b]
-  b = [k.replace('[', '') for k in b]
-  b = [k.replace(']', '') for k in b]
-  b = ['*'.join(b[i:i+5]) for i in range(0, len(b)-4, 2)]
-  return b
-
-def process_glycans(glycan_list):
-  """converts list of glycans into a list of lists of glycowords"""
-  glycan_motifs = [motif_find(k) for k in glycan_list]
-  glycan_motifs = [[i.split('*') for i in k] for k in glycan_motifs]
-  return glycan_motifs
+from artifact_cache import DATASET_PATH
+from glycan_scanner import glycowords_batch
 
 # --- Main script logic ---
 print("Generating vocabulary for the backend...")
 
-DATASET_PATH = "dataset/merged_glycan_dataset.csv"
 OUTPUT_FILE = "glycoword_vocab.json"
 
 if not os.path.exists(DATASET_PATH):
@@ -40,7 +23,7 @@ df_immuno.dropna(subset=['label'], inplace=True)
 df_immuno['label'] = df_immuno['label'].astype(int)
 
 # Process glycans to get glycowords
-df_immuno['glycan_processed'] = process_glycans(df_immuno.glycan.values.tolist())
+df_immuno['glycan_processed'] = glycowords_batch(df_immuno.glycan.values.tolist())
 
 # Create the library (vocabulary) of unique glycowords
 lib_nested_list = [item for sublist in df_immuno.glycan_processed.values.tolist() for item in sublist]
@@ -0,0 +1,43 @@
+import itertools
+from functools import lru_cache
+
+import torch
+from torch_geometric.data import Data
+
+
+@lru_cache(maxsize=1024)
+def path_edge_index(n):
+    """Bidirectional path topology shared by every glycoword chain of length n (forward edges, then backward).
+
+    The cached tensor is shared between callers and must not be modified in place.
+    """
+    if n < 2:
+        return torch.empty((2, 0), dtype=torch.long)
+    src = torch.arange(n - 1, dtype=torch.long)
+    return torch.stack([torch.cat([src, src + 1]), torch.cat([src + 1, src])])
+
+
+def sequence_to_graph(seq_tokens, label=0):
+    if len(seq_tokens) == 0:
+        return None
+    x = torch.as_tensor(seq_tokens, dtype=torch.long).view(-1, 1)
+    edge_index = path_edge_index(len(seq_tokens))
+    y = torch.tensor([label], dtype=torch.float)
+    return Data(x=x, edge_index=edge_index, y=y)
+
+
+def collate_token_lists(token_lists):
+    """Builds (x, edge_index, batch) for many token lists at once by offsetting cached path templates.
+
+    Produces exactly what Batch.from_data_list([sequence_to_graph(t) for t in token_lists]) would,
+    without creating a Data object per graph.
+    """
+    lengths = torch.tensor([len(tokens) for tokens in token_lists], dtype=torch.long)
+    if len(token_lists) == 0 or int(lengths.min()) == 0:
+        raise ValueError("Cannot build a graph from an empty token list.")
+    x = torch.tensor(list(itertools.chain.from_iterable(token_lists)), dtype=torch.long).view(-1, 1)
+    edge_index = torch.cat([path_edge_index(n) for n in lengths.tolist()], dim=1)
+    node_offsets = torch.cumsum(lengths, 0) - lengths
+    edge_index = edge_index + torch.repeat_interleave(node_offsets, 2 * (lengths - 1))
+    batch = torch.repeat_interleave(torch.arange(len(token_lists), dtype=torch.long), lengths)
+    return x, edge_index, batch
@@ -0,0 +1,51 @@
+"""Single tokenizer for IUPAC-condensed glycan strings, shared by every module that splits glycans.
+
+scan() turns a sequence into its alternating monosaccharide/linkage tokens: branch brackets are
+dropped and the string is split on parentheses, in linear time with C-level str operations
+(the old `sum([...], [])` flattening was quadratic). Glycowords are the overlapping 5-token
+windows starting at every monosaccharide.
+
+check_scanner.py checks that it reproduces the previous motif_find/process_glycans copies and the
+committed glycoword vocabulary; bench_suite.py runs it before benchmarking.
+"""
+
+_DROP_BRACKETS = str.maketrans('', '', '[]')
+
+
+def scan(s):
+    """Monosaccharide/linkage tokens of a glycan: 'Gal(b1-4)[Fuc(a1-3)]Glc' -> ['Gal', 'b1-4', 'Fuc', 'a1-3', 'Glc']."""
+    return s.translate(_DROP_BRACKETS).replace(')', '(').split('(')
+
+
+def windows(tokens):
+    """Overlapping 5-token glycowords (monosaccharide, linkage, monosaccharide, linkage, monosaccharide)."""
+    return [tuple(tokens[i:i+5]) for i in range(0, len(tokens)-4, 2)]
+
+
+def iter_glycowords(glycan_list):
+    """Lazily yields the glycoword list of each glycan."""
+    for s in glycan_list:
+        yield windows(scan(s))
+
+
+def glycowords(s):
+    return windows(scan(s))
+
+
+def glycowords_batch(glycan_list):
+    return list(iter_glycowords(glycan_list))
+
+
+def motif_find(s):
+    """converts a IUPACcondensed-ish glycan into a list of overlapping, asterisk-separated glycowords"""
+    return ['*'.join(w) for w in glycowords(s)]
+
+
+def small_motif_find(s):
+    return '*'.join(scan(s))
+
+
+def process_glycans(glycan_list):
+    """glycowords of every glycan in glycan_list, flattened into one list of token lists"""
+    return [list(w) for words in iter_glycowords(glycan_list) for w in words]
+
@@ -0,0 +1,140 @@
+"""Inverted index from glycoword to the corpus glycans that contain it.
+
+Every glycan in merged_glycan_dataset.csv is split into the same 5-token windows as motif_find;
+each distinct glycoword maps to the sorted row numbers of the glycans containing it. Postings
+are stored CSR-style (one concatenated int32 array plus offsets) as .npy files that are
+memory-mapped on load, named by the dataset digest so they are rebuilt when it changes.
+Queries intersect (AND) or merge (OR) the sorted posting arrays. A motif spanning several
+glycowords is looked up by intersecting their postings, which only proves each glycoword occurs
+somewhere; those candidates are then checked for the motif's contiguous token chain.
+
+Build ahead of time from src/Backend:  python glycoword_index.py
+"""
+import json
+import os
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from artifact_cache import DATASET_PATH, atomic_write, cache_path, file_sha256, save_npy_atomic
+from glycan_scanner import glycowords, iter_glycowords, scan, windows
+
+
+def _artifact_paths():
+    digest = file_sha256(DATASET_PATH)[:16]
+    return tuple(cache_path(f"glycoword_index.{digest}.{part}") for part in ("postings.npy", "offsets.npy", "json"))
+
+
+def query_glycowords(motif):
+    """Glycowords a glycan must contain to contain `motif`.
+
+    Accepts a '*'-joined glycoword (or longer '*'-joined token chain) or an IUPAC-condensed
+    motif of at least three monosaccharides.
+    """
+    motif = motif.strip()
+    tokens = motif.split('*') if '*' in motif else None
+    words = windows(tokens) if tokens else glycowords(motif)
+    if not words:
+        raise ValueError(f"Motif {motif!r} is shorter than one glycoword (3 monosaccharides, 2 linkages).")
+    return words
+
+
+def glycoword_chain(words):
+    """The token chain covered by consecutive overlapping glycowords."""
+    return list(words[0]) + [token for word in words[1:] for token in word[3:]]
+
+
+def contains_chain(tokens, chain):
+    """True if `chain` occurs contiguously in `tokens`, starting at a monosaccharide."""
+    n = len(chain)
+    return any(tokens[i:i + n] == chain for i in range(0, len(tokens) - n + 1, 2))
+
+
+def build_glycoword_index(postings_path, offsets_path, meta_path):
+    df = pd.read_csv(DATASET_PATH).dropna(subset=["glycan"])
+    glycans = df.glycan.str.strip().tolist()
+    glycan_ids = [None if pd.isna(i) else i for i in df.glycan_id]
+    labels = [None if pd.isna(label) else int(label) for label in df.label]
+
+    rows_by_word = {}
+    for row, words in enumerate(iter_glycowords(glycans)):
+        for word in set(words):
+            rows_by_word.setdefault('*'.join(word), []).append(row)
+    keys = sorted(rows_by_word)
+    offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(rows_by_word[k]) for k in keys])
+    postings = np.fromiter((row for k in keys for row in rows_by_word[k]), dtype=np.int32, count=int(offsets[-1]))
+
+    def write_meta(path):
+        with open(path, 'w') as f:
+            json.dump({"glycowords": keys, "glycans": glycans, "glycan_ids": glycan_ids, "labels": labels}, f)
+
+    save_npy_atomic(postings_path, postings)
+    save_npy_atomic(offsets_path, offsets)
+    atomic_write(meta_path, write_meta)
+    print(f"Indexed {len(keys)} glycowords over {len(glycans)} glycans into {postings_path}.")
+
+
+class GlycowordIndex:
+    def __init__(self, postings, offsets, glycowords, glycans, glycan_ids, labels):
+        self.postings = postings
+        self.offsets = offsets
+        self.index = {word: i for i, word in enumerate(glycowords)}
+        self.glycans = glycans
+        self.glycan_ids = glycan_ids
+        self.labels = labels
+
+    @classmethod
+    def load(cls):
+        postings_path, offsets_path, meta_path = _artifact_paths()
+        if not all(os.path.exists(p) for p in (postings_path, offsets_path, meta_path)):
+            build_glycoword_index(postings_path, offsets_path, meta_path)
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        return cls(np.load(postings_path, mmap_mode='r'), np.load(offsets_path),
+                   meta["glycowords"], meta["glycans"], meta["glycan_ids"], meta["labels"])
+
+    def __len__(self):
+        return len(self.glycans)
+
+    def rows(self, glycoword):
+        """Sorted rows of the glycans containing one glycoword (a token tuple)."""
+        i = self.index.get('*'.join(glycoword))
+        if i is None:
+            return np.empty(0, dtype=np.int32)
+        return self.postings[self.offsets[i]:self.offsets[i + 1]]
+
+    def motif_rows(self, motif):
+        words = query_glycowords(motif)
+        # Rarest glycoword first keeps every intersection no larger than the smallest posting list.
+        postings = sorted((self.rows(w) for w in words), key=len)
+        candidates = reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), postings)
+        if len(words) == 1:
+            return candidates
+        chain = glycoword_chain(words)
+        keep = np.fromiter((contains_chain(scan(self.glycans[i]), chain) for i in candidates.tolist()),
+                           dtype=bool, count=len(candidates))
+        return candidates[keep]
+
+    def search(self, motifs, operator='and'):
+        """Sorted rows of the glycans containing all ('and') or any ('or') of the motifs."""
+        if operator not in ('and', 'or'):
+            raise ValueError("operator must be 'and' or 'or'")
+        if not motifs:
+            raise ValueError("No motifs provided")
+        matches = [self.motif_rows(m) for m in motifs]
+        if operator == 'and':
+            return reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), sorted(matches, key=len))
+        return reduce(np.union1d, matches)
+
+    def describe(self, rows):
+        return [{
+            "glycan": self.glycans[i],
+            "glycan_id": self.glycan_ids[i],
+            "label": self.labels[i]
+        } for i in rows]
+
+
+if __name__ == "__main__":
+    build_glycoword_index(*_artifact_paths())
@@ -0,0 +1,74 @@
+import json
+import numpy as np
+
+from glycan_scanner import glycowords as sequence_to_glycowords
+
+
+class UnknownGlycowordError(ValueError):
+    def __init__(self, glycowords):
+        self.glycowords = glycowords
+        super().__init__(f"Unknown glycowords: {['*'.join(w) for w in glycowords]}")
+
+
+class GlycowordTokenizer:
+    """Maps glycowords to vocabulary ids through a hash table built once from the vocabulary.
+
+    Unknown glycowords are handled according to `unknown`:
+      'error' - raise UnknownGlycowordError (a ValueError)
+      'skip'  - drop the glycoword
+      'unk'   - map it to `unk_id`, the spare embedding row past the vocabulary
+    """
+
+    UNKNOWN_POLICIES = ('error', 'skip', 'unk')
+
+    def __init__(self, vocab, unknown='error'):
+        if unknown not in self.UNKNOWN_POLICIES:
+            raise ValueError(f"unknown must be one of {self.UNKNOWN_POLICIES}, got {unknown!r}")
+        self.vocab = [tuple(word) for word in vocab]
+        self.index = {word: i for i, word in enumerate(self.vocab)}
+        self.unk_id = len(self.vocab)
+        self.unknown = unknown
+
+    @classmethod
+    def from_file(cls, path, unknown='error'):
+        with open(path, 'r') as f:
+            return cls(json.load(f), unknown=unknown)
+
+    def __len__(self):
+        return len(self.vocab)
+
+    def unknown_glycowords(self, glycowords):
+        return [tuple(w) for w in glycowords if tuple(w) not in self.index]
+
+    def encode_glycowords(self, glycowords, unknown=None):
+        unknown = unknown or self.unknown
+        index = self.index
+        ids = []
+        missing = []
+        for word in glycowords:
+            i = index.get(tuple(word))
+            if i is not None:
+                ids.append(i)
+            elif unknown == 'unk':
+                ids.append(self.unk_id)
+            elif unknown == 'error':
+                missing.append(tuple(word))
+        if missing:
+            raise UnknownGlycowordError(missing)
+        return ids
+
+    def encode(self, sequences, padded=False, pad_id=-1, unknown=None):
+        """Encodes a list of IUPAC sequences.
+
+        Returns a list of int64 arrays (ragged), or with padded=True a (len(sequences), max_len)
+        array filled with pad_id plus the array of sequence lengths.
+        """
+        encoded = [np.asarray(self.encode_glycowords(sequence_to_glycowords(s), unknown=unknown), dtype=np.int64)
+                   for s in sequences]
+        if not padded:
+            return encoded
+        lengths = np.array([len(ids) for ids in encoded], dtype=np.int64)
+        out = np.full((len(encoded), int(lengths.max(initial=0))), pad_id, dtype=np.int64)
+        for row, ids in enumerate(encoded):
+            out[row, :len(ids)] = ids
+        return out, lengths
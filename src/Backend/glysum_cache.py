@@ -0,0 +1,54 @@
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from artifact_cache import atomic_write, cache_path, file_sha256, save_npy_atomic
+
+GLYSUM_PATH = "GLYSUM.xlsx"
+
+
+def _artifact_paths(digest):
+    return cache_path(f"GLYSUM.{digest}.npy"), cache_path(f"GLYSUM.{digest}.names.json")
+
+
+def build_glysum_cache(xlsx_path, digest):
+    """Parses the workbook once and writes the score matrix (.npy) and its row/column names (.json)."""
+    matrix_path, names_path = _artifact_paths(digest)
+    df = pd.read_excel(xlsx_path, index_col=0)
+    scores = np.ascontiguousarray(df.to_numpy(dtype=np.float64))
+    names = [str(name) for name in df.index.tolist()]
+
+    def write_names(path):
+        with open(path, 'w') as f:
+            json.dump(names, f)
+
+    save_npy_atomic(matrix_path, scores)
+    atomic_write(names_path, write_names)
+
+    # Drop artifacts compiled from previous versions of the workbook.
+    for stale in glob.glob(cache_path("GLYSUM.*")):
+        if digest not in os.path.basename(stale):
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+
+def load_glysum(xlsx_path=GLYSUM_PATH):
+    """Returns (glycan_names, scores) with scores memory-mapped read-only from the compiled .npy.
+
+    The binary form is rebuilt whenever the workbook's SHA-256 changes, so every worker process
+    maps the same file pages instead of parsing Excel.
+    """
+    digest = file_sha256(xlsx_path)[:16]
+    matrix_path, names_path = _artifact_paths(digest)
+    if not (os.path.exists(matrix_path) and os.path.exists(names_path)):
+        print(f"Compiling {xlsx_path} into {matrix_path}...")
+        build_glysum_cache(xlsx_path, digest)
+    scores = np.load(matrix_path, mmap_mode='r')
+    with open(names_path, 'r') as f:
+        glycan_names = tuple(json.load(f))
+    return glycan_names, scores
@@ -0,0 +1,143 @@
+import copy
+import os
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch import Tensor
+from torch_geometric.nn import MessagePassing, global_mean_pool
+from torch_geometric.utils import add_self_loops
+
+# ============================ Model Settings ===============================
+
+EMBED_DIM = 64
+HIDDEN_DIM = 64
+OUTPUT_DIM = 1
+DROPOUT = 0.5
+MODEL_PATH = 'Models_MPNN_immunoClassifier_final.pt'
+
+# 'eager' (fp32), 'torchscript' (scripted fp32) or 'int8' (dynamically quantized nn.Linear layers).
+INFERENCE_BACKENDS = ('eager', 'torchscript', 'int8')
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'eager')
+# Maximum allowed absolute difference between a backend's sigmoid scores and the eager fp32 scores.
+BACKEND_TOLERANCE = float(os.environ.get('INFERENCE_BACKEND_TOLERANCE', 0.02))
+
+# =========================== Model Definition ==============================
+
+class MPNNLayer(MessagePassing):
+    propagate_type = {'x': Tensor}
+
+    def __init__(self, in_dim, out_dim):
+        super(MPNNLayer, self).__init__(aggr='add')
+        self.lin = nn.Linear(in_dim, out_dim)
+
+    def forward(self, x: Tensor, edge_index: Tensor) -> Tensor:
+        edge_index, _ = add_self_loops(edge_index, num_nodes=x.size(0))
+        return self.propagate(edge_index, x=x)
+
+    def message(self, x_j: Tensor) -> Tensor:
+        return x_j
+
+    def update(self, aggr_out: Tensor) -> Tensor:
+        return self.lin(aggr_out)
+
+class MPNNClassifier(nn.Module):
+    def __init__(self, vocab_size, embed_dim, hidden_dim, output_dim, dropout=0.5):
+        super(MPNNClassifier, self).__init__()
+        self.embedding = nn.Embedding(vocab_size, embed_dim)
+        self.mpnn1 = MPNNLayer(embed_dim, hidden_dim)
+        self.bn1 = nn.BatchNorm1d(hidden_dim)
+        self.mpnn2 = MPNNLayer(hidden_dim, hidden_dim)
+        self.bn2 = nn.BatchNorm1d(hidden_dim)
+        self.lin1 = nn.Linear(hidden_dim, hidden_dim // 2)
+        self.dropout = nn.Dropout(dropout)
+        self.lin2 = nn.Linear(hidden_dim // 2, output_dim)
+
+    @torch.jit.export
+    def embed(self, x: Tensor, edge_index: Tensor, batch: Tensor) -> Tensor:
+        """The pooled graph representation (HIDDEN_DIM per glycan) fed to the classification head."""
+        x = self.embedding(x.squeeze(1))
+        x = F.relu(self.bn1(self.mpnn1(x, edge_index)))
+        x = F.relu(self.bn2(self.mpnn2(x, edge_index)))
+        return global_mean_pool(x, batch)
+
+    def forward(self, x: Tensor, edge_index: Tensor, batch: Tensor) -> Tensor:
+        x = self.embed(x, edge_index, batch)
+        x = F.relu(self.lin1(x))
+        x = self.dropout(x)
+        x = self.lin2(x)
+        return x
+
+# ============================ Loading ======================================
+
+def load_model(path, vocab_size, device):
+    model = MPNNClassifier(
+        vocab_size=vocab_size,
+        embed_dim=EMBED_DIM,
+        hidden_dim=HIDDEN_DIM,
+        output_dim=OUTPUT_DIM,
+        dropout=DROPOUT
+    )
+    model.load_state_dict(torch.load(path, map_location=device))
+    model.to(device)
+    model.eval()
+    return model
+
+def compile_backend(model, backend):
+    """Returns an inference module for `backend` built from an eager fp32 model."""
+    if backend == 'eager':
+        return model
+    if backend == 'torchscript':
+        scripted = copy.deepcopy(model)
+        for name in ('mpnn1', 'mpnn2'):
+            layer = getattr(scripted, name)
+            # torch_geometric < 2.5 needs jittable() before a MessagePassing layer can be scripted.
+            if hasattr(layer, 'jittable'):
+                setattr(scripted, name, layer.jittable())
+        return torch.jit.freeze(torch.jit.script(scripted.eval()), preserved_attrs=['embed'])
+    if backend == 'int8':
+        if next(model.parameters()).device.type != 'cpu':
+            raise RuntimeError("int8 dynamic quantization is only supported on CPU")
+        return torch.ao.quantization.quantize_dynamic(copy.deepcopy(model), {nn.Linear}, dtype=torch.qint8)
+    raise ValueError(f"Unknown inference backend {backend!r}, expected one of {INFERENCE_BACKENDS}")
+
+def reference_batch(vocab_size, device, n_graphs=64, max_len=40, seed=0):
+    """A reproducible batch of random path graphs used to compare backends."""
+    generator = torch.Generator().manual_seed(seed)
+    lengths = torch.randint(1, max_len + 1, (n_graphs,), generator=generator)
+    x = torch.randint(0, vocab_size - 1, (int(lengths.sum()), 1), generator=generator)
+    edges, offset = [], 0
+    for n in lengths.tolist():
+        src = torch.arange(offset, offset + n - 1)
+        edges.append(torch.stack([torch.cat([src, src + 1]), torch.cat([src + 1, src])]))
+        offset += n
+    edge_index = torch.cat(edges, dim=1)
+    batch = torch.repeat_interleave(torch.arange(n_graphs), lengths)
+    return x.to(device), edge_index.to(device), batch.to(device)
+
+def backend_max_error(reference, candidate, inputs):
+    with torch.no_grad():
+        expected = torch.sigmoid(reference(*inputs))
+        actual = torch.sigmoid(candidate(*inputs))
+    return (expected - actual).abs().max().item()
+
+def load_inference_model(path, vocab_size, device, backend=INFERENCE_BACKEND, tolerance=BACKEND_TOLERANCE):
+    """Loads the checkpoint and builds the requested backend, falling back to eager fp32 when the
+    backend cannot be built or its scores drift from fp32 by more than `tolerance`.
+
+    Returns (inference_module, backend_used).
+    """
+    model = load_model(path, vocab_size, device)
+    if backend == 'eager':
+        return model, 'eager'
+    try:
+        candidate = compile_backend(model, backend)
+        error = backend_max_error(model, candidate, reference_batch(vocab_size, device))
+    except Exception as e:
+        print(f"Warning: could not build '{backend}' inference backend ({e}). Falling back to eager fp32.")
+        return model, 'eager'
+    if error > tolerance:
+        print(f"Warning: '{backend}' scores differ from fp32 by {error:.4g} (> {tolerance}). Falling back to eager fp32.")
+        return model, 'eager'
+    print(f"Inference backend '{backend}' verified against fp32 (max score difference {error:.2e}).")
+    return candidate, backend
@@ -1,11 +1,14 @@
 from flask import Blueprint, request, jsonify
-from glycowork.motif.query import get_insight, glytoucan_to_glycan
 import io
 import sys
 import traceback
 
+from lazy_loading import lazy_import
+
 insight_api = Blueprint('insight_api', __name__)
 
+QUERY = lazy_import("glycowork.motif.query")
+
 @insight_api.route('/api/glycan_insight', methods=['POST', 'OPTIONS'])
 def glycan_insight():
     if request.method == 'OPTIONS':
@@ -20,7 +23,7 @@ def glycan_insight():
     try:
         if user_input.startswith('G') and '(' not in user_input:
             print(f"Detected GlyTouCan ID: {user_input}. Converting to sequence...")
-            result_list = glytoucan_to_glycan([user_input])
+            result_list = QUERY.get().glytoucan_to_glycan([user_input])
             if result_list and result_list[0]:
                 glycan_sequence = result_list[0]
             else:
@@ -36,7 +39,7 @@ def glycan_insight():
     sys.stdout = buffer
 
     try:
-        get_insight(glycan_sequence)
+        QUERY.get().get_insight(glycan_sequence)
     except Exception as e:
         sys.stdout = original_stdout 
         print(traceback.format_exc())
@@ -0,0 +1,116 @@
+"""Shared memoization of glycowork's canonicalize_iupac + IUPAC_to_SMILES.
+
+Two tiers: an in-process LRU in front of a SQLite store under cache/ that maps the raw input to
+its canonical IUPAC and SMILES. The store is shared by every worker (WAL mode, one connection
+per thread and process) and survives restarts. Rows are tagged with the glycowork version, so
+upgrading glycowork recomputes instead of serving stale conversions. Failed conversions are
+not cached.
+"""
+import os
+import threading
+from importlib import metadata
+
+from artifact_cache import SQLiteConnections
+from lazy_loading import lazy_import
+from result_cache import LRUTTLCache
+
+PROCESSING = lazy_import("glycowork.motif.processing")
+
+IUPAC_CACHE_FILE = "iupac_conversions.sqlite"
+IUPAC_CACHE_SIZE = int(os.environ.get("IUPAC_CACHE_SIZE", 4096))
+CONVERSIONS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversions (
+    raw TEXT NOT NULL, version TEXT NOT NULL, canonical TEXT NOT NULL, smiles TEXT,
+    PRIMARY KEY (raw, version)
+);
+"""
+
+
+def glycowork_version():
+    try:
+        return metadata.version("glycowork")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+class ConversionCache:
+    def __init__(self, name=IUPAC_CACHE_FILE, maxsize=IUPAC_CACHE_SIZE, version=None):
+        self.name = name
+        self.version = version or glycowork_version()
+        self.memory = LRUTTLCache(maxsize=maxsize)
+        self._connection = SQLiteConnections(name, CONVERSIONS_SCHEMA).get
+        self._lock = threading.Lock()
+        self.disk_hits = 0
+        self.disk_misses = 0
+
+    def get(self, raw):
+        """(canonical, smiles) for a raw IUPAC string, or None if it was never converted."""
+        value = self.memory.get(raw)
+        if value is not None:
+            return value
+        row = self._connection().execute(
+            "SELECT canonical, smiles FROM conversions WHERE raw = ? AND version = ?", (raw, self.version)).fetchone()
+        with self._lock:
+            if row is None:
+                self.disk_misses += 1
+                return None
+            self.disk_hits += 1
+        value = (row[0], row[1])
+        self.memory.set(raw, value)
+        return value
+
+    def set(self, raw, canonical, smiles):
+        conn = self._connection()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO conversions (raw, version, canonical, smiles) VALUES (?, ?, ?, ?)",
+                         (raw, self.version, canonical, smiles))
+        self.memory.set(raw, (canonical, smiles))
+
+    def convert(self, raw):
+        """Canonical IUPAC and SMILES of `raw`, computed with glycowork only on a miss in both tiers."""
+        raw = raw.strip()
+        value = self.get(raw)
+        if value is not None and value[1] is not None:
+            return value
+        processing = PROCESSING.get()
+        canonical = value[0] if value is not None else processing.canonicalize_iupac(raw)
+        smiles = processing.IUPAC_to_SMILES([canonical])[0]
+        self.set(raw, canonical, smiles)
+        return canonical, smiles
+
+    def canonicalize(self, raw):
+        """Canonical IUPAC only; skips IUPAC_to_SMILES (stored without SMILES until convert() needs it)."""
+        raw = raw.strip()
+        value = self.get(raw)
+        if value is not None:
+            return value[0]
+        canonical = PROCESSING.get().canonicalize_iupac(raw)
+        self.set(raw, canonical, None)
+        return canonical
+
+    def stats(self):
+        memory = self.memory.stats()
+        with self._lock:
+            disk_lookups = self.disk_hits + self.disk_misses
+            lookups = memory["hits"] + memory["misses"]
+            return {
+                "glycowork_version": self.version,
+                "memory": memory,
+                "disk": {
+                    "hits": self.disk_hits,
+                    "misses": self.disk_misses,
+                    "hit_rate": self.disk_hits / disk_lookups if disk_lookups else 0.0
+                },
+                "hit_rate": (memory["hits"] + self.disk_hits) / lookups if lookups else 0.0
+            }
+
+
+CONVERSIONS = ConversionCache()
+
+
+def canonical_smiles(raw):
+    return CONVERSIONS.convert(raw)
+
+
+def canonical_iupac(raw):
+    return CONVERSIONS.canonicalize(raw)
@@ -0,0 +1,228 @@
+"""Brokerless background jobs for slow endpoints.
+
+An endpoint decorated with @async_job runs as usual, but with ?async=true the request body is
+stored in a SQLite job table under cache/ and 202 + a job id is returned at once. The view then
+runs on a per-type thread pool inside a request context rebuilt from the stored payload, and its
+JSON response and status code become the job result, polled through jobs_api.
+
+A job type's concurrency limit holds across all worker processes (prefork server, several
+gunicorn workers): a queued job starts only once it claims a slot in the shared table, i.e. fewer
+than `concurrency` jobs of its type are running in live processes; otherwise its thread waits
+and claims again every JOB_CLAIM_INTERVAL seconds. A job whose (type, payload) matches a queued,
+running or recently finished one returns that job instead of running again.
+
+The table is shared by every worker process: any worker can report or cancel any job. Queued
+jobs are cancelled outright; a running job cannot be interrupted, so it is marked cancelled and
+its result discarded. Jobs left running by a process that died are reported as failed.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from flask import current_app, jsonify, request, url_for
+
+from artifact_cache import SQLiteConnections
+
+JOBS_FILE = "jobs.sqlite"
+# Finished jobs are reused for identical payloads for JOB_DEDUP_TTL seconds and deleted after JOB_RETENTION.
+JOB_DEDUP_TTL = float(os.environ.get("JOB_DEDUP_TTL", 3600))
+JOB_RETENTION = float(os.environ.get("JOB_RETENTION", 24 * 3600))
+JOB_CLAIM_INTERVAL = float(os.environ.get("JOB_CLAIM_INTERVAL", 0.5))
+JOBS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY, type TEXT NOT NULL, payload_hash TEXT NOT NULL, path TEXT NOT NULL, payload TEXT,
+    status TEXT NOT NULL, status_code INTEGER, result TEXT, pid INTEGER,
+    created REAL NOT NULL, started REAL, finished REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_payload ON jobs (type, payload_hash);
+CREATE INDEX IF NOT EXISTS jobs_by_finished ON jobs (finished);
+"""
+ACTIVE = ("queued", "running")
+
+# job type -> (view function, concurrency limit)
+JOB_TYPES = {}
+
+
+def payload_hash(job_type, payload):
+    return hashlib.sha256(f"{job_type}\0{json.dumps(payload, sort_keys=True)}".encode()).hexdigest()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobQueue:
+    def __init__(self, name=JOBS_FILE):
+        self.name = name
+        self._connection = SQLiteConnections(name, JOBS_SCHEMA, row_factory=sqlite3.Row).get
+        self._lock = threading.Lock()
+        self._executors = {}
+        self._futures = {}
+        self._pid = None
+
+    def _executor(self, job_type):
+        # Thread pools do not survive a fork; each worker process builds its own.
+        with self._lock:
+            if self._pid != os.getpid():
+                self._executors, self._futures, self._pid = {}, {}, os.getpid()
+            if job_type not in self._executors:
+                self._executors[job_type] = ThreadPoolExecutor(
+                    max_workers=JOB_TYPES[job_type][1], thread_name_prefix=f"job-{job_type}")
+            return self._executors[job_type]
+
+    def submit(self, job_type, path, payload):
+        """Returns (job, created): the existing job for an identical payload, or a newly queued one."""
+        digest = payload_hash(job_type, payload)
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM jobs WHERE finished IS NOT NULL AND finished < ?", (now - JOB_RETENTION,))
+            existing = conn.execute(
+                "SELECT * FROM jobs WHERE type = ? AND payload_hash = ? AND "
+                "(status IN ('queued', 'running') OR (status = 'succeeded' AND finished >= ?)) "
+                "ORDER BY created DESC LIMIT 1", (job_type, digest, now - JOB_DEDUP_TTL)).fetchone()
+            if existing and not self._orphaned(existing):
+                return existing, False
+            job_id = uuid.uuid4().hex
+            conn.execute("INSERT INTO jobs (id, type, payload_hash, path, payload, status, pid, created) "
+                         "VALUES (?, ?, ?, ?, ?, 'queued', ?, ?)",
+                         (job_id, job_type, digest, path, json.dumps(payload), os.getpid(), now))
+        app = current_app._get_current_object()
+        future = self._executor(job_type).submit(self._run, app, job_id)
+        with self._lock:
+            self._futures[job_id] = future
+        future.add_done_callback(lambda _: self._futures.pop(job_id, None))
+        if future.done():
+            self._futures.pop(job_id, None)
+        return self.get(job_id), True
+
+    def _orphaned(self, job):
+        return job["status"] in ACTIVE and not _pid_alive(job["pid"])
+
+    def _claim(self, job_id):
+        """Marks a queued job running if its type has a free slot across all processes.
+
+        Returns True once claimed, False if no slot is free, None if the job is no longer queued.
+        """
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            job = conn.execute("SELECT type, status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None or job["status"] != "queued":
+                return None
+            running = conn.execute("SELECT pid FROM jobs WHERE type = ? AND status = 'running'", (job["type"],)).fetchall()
+            if sum(_pid_alive(row["pid"]) for row in running) >= JOB_TYPES[job["type"]][1]:
+                return False
+            conn.execute("UPDATE jobs SET status = 'running', started = ?, pid = ? WHERE id = ?",
+                         (time.time(), os.getpid(), job_id))
+        return True
+
+    def _run(self, app, job_id):
+        claimed = self._claim(job_id)
+        while claimed is False:
+            time.sleep(JOB_CLAIM_INTERVAL)
+            claimed = self._claim(job_id)
+        if not claimed:
+            return  # cancelled before it started
+        conn = self._connection()
+        job = self.get(job_id)
+        view = JOB_TYPES[job["type"]][0]
+        try:
+            with app.test_request_context(job["path"], method="POST", json=json.loads(job["payload"])):
+                response = app.make_response(view())
+            status_code, result = response.status_code, response.get_data(as_text=True)
+        except Exception as e:
+            status_code, result = 500, json.dumps({"error": str(e)})
+        with conn:
+            conn.execute("UPDATE jobs SET status = ?, status_code = ?, result = ?, finished = ? "
+                         "WHERE id = ? AND status = 'running'",
+                         ("succeeded" if status_code < 400 else "failed", status_code, result, time.time(), job_id))
+
+    def get(self, job_id):
+        job = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if job and self._orphaned(job):
+            conn = self._connection()
+            with conn:
+                conn.execute("UPDATE jobs SET status = 'failed', status_code = 500, result = ?, finished = ? "
+                             "WHERE id = ? AND status IN ('queued', 'running')",
+                             (json.dumps({"error": "The worker running this job exited."}), time.time(), job_id))
+            job = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return job
+
+    def cancel(self, job_id):
+        """Marks a queued or running job cancelled; returns the job (None if unknown)."""
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            future.cancel()
+        conn = self._connection()
+        with conn:
+            conn.execute("UPDATE jobs SET status = 'cancelled', finished = ? WHERE id = ? AND status IN ('queued', 'running')",
+                         (time.time(), job_id))
+        return self.get(job_id)
+
+    def stats(self):
+        rows = self._connection().execute("SELECT type, status, COUNT(*) AS n FROM jobs GROUP BY type, status").fetchall()
+        counts = {}
+        for row in rows:
+            counts.setdefault(row["type"], {})[row["status"]] = row["n"]
+        return {
+            job_type: {"concurrency": concurrency, "jobs": counts.get(job_type, {})}
+            for job_type, (_, concurrency) in JOB_TYPES.items()
+        }
+
+
+JOBS = JobQueue()
+
+
+def describe(job):
+    """Public view of a job row: result parsed as JSON once the job has finished."""
+    body = {
+        "job_id": job["id"],
+        "type": job["type"],
+        "status": job["status"],
+        "created": job["created"],
+        "started": job["started"],
+        "finished": job["finished"]
+    }
+    if job["result"] is not None:
+        body["status_code"] = job["status_code"]
+        try:
+            body["result"] = json.loads(job["result"])
+        except ValueError:
+            body["result"] = job["result"]
+    return body
+
+
+def async_job(job_type, concurrency=1):
+    """Lets a JSON POST view run as a background job when called with ?async=true."""
+    def decorator(view):
+        JOB_TYPES[job_type] = (view, concurrency)
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.args.get("async", "").lower() not in ("1", "true", "yes"):
+                return view(*args, **kwargs)
+            payload = request.get_json(silent=True)
+            if payload is None:
+                return jsonify({"error": "Request must be JSON"}), 400
+            job, created = JOBS.submit(job_type, request.path, payload)
+            body = describe(job)
+            body["status_url"] = url_for("jobs_api.job_status", job_id=job["id"])
+            body["deduplicated"] = not created
+            return jsonify(body), 202
+        return wrapper
+    return decorator
@@ -0,0 +1,25 @@
+from flask import Blueprint, jsonify
+
+from job_queue import JOBS, describe
+
+jobs_api = Blueprint('jobs_api', __name__)
+
+@jobs_api.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    """Status of a job submitted with ?async=true, with the endpoint's JSON response once finished."""
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job id"}), 404
+    return jsonify(describe(job))
+
+@jobs_api.route("/jobs/<job_id>", methods=["DELETE"])
+def cancel_job(job_id):
+    job = JOBS.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job id"}), 404
+    return jsonify(describe(job))
+
+@jobs_api.route("/jobs", methods=["GET"])
+def job_stats():
+    """Per-type concurrency limits and job counts by status."""
+    return jsonify(JOBS.stats())
@@ -0,0 +1,122 @@
+import importlib
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+
+# Every LazyResource registers itself here so the warm-up thread and the startup report can find it.
+RESOURCES = []
+# (phase, seconds) pairs recorded with `timed`, e.g. each blueprint import in app.py.
+STARTUP_TIMINGS = []
+_process_start = time.perf_counter()
+
+
+class LazyResource:
+    """A heavy value (model, matrix, data frame, module) built on first `get()` exactly once.
+
+    Concurrent callers block on the same load; a failed load is retried on the next `get()`.
+    warm=False leaves the resource out of warm_up, for loads that are expected to fail for a while.
+    """
+
+    def __init__(self, name, loader, warm=True):
+        self.name = name
+        self.loader = loader
+        self.warm = warm
+        self._value = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.load_seconds = None
+        self.loaded_by = None
+        self.error = None
+        RESOURCES.append(self)
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def get(self):
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                start = time.perf_counter()
+                try:
+                    self._value = self.loader()
+                except Exception as e:
+                    self.error = str(e)
+                    raise
+                self.load_seconds = time.perf_counter() - start
+                self.loaded_by = threading.current_thread().name
+                self.error = None
+                self._loaded = True
+        return self._value
+
+    def reset(self):
+        with self._lock:
+            self._value = None
+            self._loaded = False
+
+    def status(self):
+        return {
+            "name": self.name,
+            "loaded": self._loaded,
+            "load_seconds": self.load_seconds,
+            "loaded_by": self.loaded_by,
+            "error": self.error
+        }
+
+
+_lazy_modules = {}
+
+
+def lazy_import(module_name):
+    """A shared LazyResource for a heavy module, e.g. lazy_import('glycowork.motif.processing').get()."""
+    if module_name not in _lazy_modules:
+        _lazy_modules[module_name] = LazyResource(module_name, lambda: importlib.import_module(module_name))
+    return _lazy_modules[module_name]
+
+
+@contextmanager
+def timed(phase):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STARTUP_TIMINGS.append((phase, time.perf_counter() - start))
+
+
+def warm_up(resources=None):
+    """Loads every registered warm resource in the calling thread, logging (not raising) failures."""
+    for resource in list(resources or RESOURCES):
+        if not resource.warm:
+            continue
+        try:
+            resource.get()
+        except Exception:
+            print(f"Warm-up of {resource.name} failed:")
+            traceback.print_exc()
+
+
+def start_warm_up(resources=None):
+    thread = threading.Thread(target=warm_up, args=(resources,), name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def startup_report():
+    return {
+        "seconds_since_start": time.perf_counter() - _process_start,
+        "phases": [{"phase": phase, "seconds": seconds}
+                   for phase, seconds in sorted(STARTUP_TIMINGS, key=lambda t: -t[1])],
+        "resources": [resource.status() for resource in RESOURCES]
+    }
+
+
+def print_startup_report():
+    report = startup_report()
+    print("Startup timing (slowest first):")
+    for phase in report["phases"]:
+        print(f"  {phase['seconds'] * 1e3:9.1f} ms  {phase['phase']}")
+    pending = [r["name"] for r in report["resources"] if not r["loaded"]]
+    if pending:
+        print(f"  deferred until first use or warm-up: {', '.join(pending)}")
@@ -0,0 +1,64 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """Collects concurrent single-item calls for a few milliseconds and runs them as one batch."""
+
+    def __init__(self, process_batch, max_batch_size=32, max_wait_ms=5.0):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._lock = threading.Lock()
+        self._queue = None
+        self._worker = None
+        self._pid = None
+
+    @property
+    def enabled(self):
+        return self.max_batch_size > 1 and self.max_wait > 0
+
+    def _ensure_worker(self):
+        # Threads do not survive fork(), so the worker is started lazily in each process.
+        if self._worker is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._worker is None or self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._worker = threading.Thread(target=self._run, args=(self._queue,), name="micro-batcher", daemon=True)
+                self._worker.start()
+
+    def submit(self, item, timeout=None):
+        if not self.enabled:
+            return self.process_batch([item])[0]
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future))
+        return future.result(timeout=timeout)
+
+    def _run(self, pending):
+        while True:
+            items = [pending.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(items) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                results = self.process_batch([item for item, _ in items])
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(items, results):
+                future.set_result(result)
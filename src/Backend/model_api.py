@@ -1,49 +1,21 @@
 import os
 import json
 import re
-import torch
-import torch.nn as nn
-import torch.nn.functional as F
 from flask import Flask, request, jsonify
 from flask import Flask, Blueprint, request, jsonify
 from flask_cors import CORS
 
-from torch_geometric.data import Data, Batch
-from torch_geometric.nn import MessagePassing, global_mean_pool
-from torch_geometric.utils import add_self_loops
+from glycan_scanner import motif_find, process_glycans
+from glycoword_tokenizer import GlycowordTokenizer, UnknownGlycowordError
+from lazy_loading import LazyResource
+from micro_batcher import MicroBatcher
+from motif_api import parse_flag
+from mutagenesis import UNKNOWN_POLICIES, mutagenesis_scan
+from result_cache import LRUTTLCache
 
 
 # ============================== Glycan Helpers ==============================
 
-def motif_find(s):
-    b = s.split('(')
-    b = [k.split(')') for k in b]
-    b = [item for sublist in b for item in sublist]
-    b = [k.strip('[]') for k in b]
-    b = ['*'.join(b[i:i+5]) for i in range(0, len(b)-4, 2)]
-    return b
-
-def process_glycans(glycan_list):
-    glycan_motifs = [motif_find(k) for k in glycan_list]
-    glycan_motifs = [[i.split('*') for i in k] for k in glycan_motifs]
-    return [item for sublist in glycan_motifs for item in sublist]
-
-def character_to_label(character, libr):
-    return libr.index(character)
-
-def string_to_labels(glycoword_list, libr):
-    return [character_to_label(word, libr) for word in glycoword_list]
-
-def sequence_to_graph(seq_tokens, label=0):
-    if not seq_tokens:
-        return None
-    x = torch.tensor(seq_tokens, dtype=torch.long).view(-1, 1)
-    edge_indices = [[i, i + 1] for i in range(len(seq_tokens) - 1)]
-    edge_indices += [[i + 1, i] for i in range(len(seq_tokens) - 1)]
-    edge_index = torch.tensor(edge_indices, dtype=torch.long).t().contiguous() if edge_indices else torch.empty((2, 0), dtype=torch.long)
-    y = torch.tensor([label], dtype=torch.float)
-    return Data(x=x, edge_index=edge_index, y=y)
-
 def detect_known_motifs(sequence):
     motifs = {
         "Gal(a1-3)Gal": "AlphaGal",
@@ -53,45 +25,6 @@ def detect_known_motifs(sequence):
     detected = [name for pattern, name in motifs.items() if pattern in sequence]
     return detected
 
-# =========================== Model Definition ==============================
-
-class MPNNLayer(MessagePassing):
-    def __init__(self, in_dim, out_dim):
-        super(MPNNLayer, self).__init__(aggr='add')
-        self.lin = nn.Linear(in_dim, out_dim)
-
-    def forward(self, x, edge_index):
-        edge_index, _ = add_self_loops(edge_index, num_nodes=x.size(0))
-        return self.propagate(edge_index, x=x)
-
-    def message(self, x_j):
-        return x_j
-
-    def update(self, aggr_out):
-        return self.lin(aggr_out)
-
-class MPNNClassifier(nn.Module):
-    def __init__(self, vocab_size, embed_dim, hidden_dim, output_dim, dropout=0.5):
-        super(MPNNClassifier, self).__init__()
-        self.embedding = nn.Embedding(vocab_size, embed_dim)
-        self.mpnn1 = MPNNLayer(embed_dim, hidden_dim)
-        self.bn1 = nn.BatchNorm1d(hidden_dim)
-        self.mpnn2 = MPNNLayer(hidden_dim, hidden_dim)
-        self.bn2 = nn.BatchNorm1d(hidden_dim)
-        self.lin1 = nn.Linear(hidden_dim, hidden_dim // 2)
-        self.dropout = nn.Dropout(dropout)
-        self.lin2 = nn.Linear(hidden_dim // 2, output_dim)
-
-    def forward(self, x, edge_index, batch):
-        x = self.embedding(x.squeeze(1))
-        x = F.relu(self.bn1(self.mpnn1(x, edge_index)))
-        x = F.relu(self.bn2(self.mpnn2(x, edge_index)))
-        x = global_mean_pool(x, batch)
-        x = F.relu(self.lin1(x))
-        x = self.dropout(x)
-        x = self.lin2(x)
-        return x
-
 # ============================ Load Model ===================================
 
 try:
@@ -101,88 +34,279 @@ except FileNotFoundError:
     print("FATAL ERROR: glycoword_vocab.json not found.")
     exit()
 
+TOKENIZER = GlycowordTokenizer(VOCAB)
 VOCAB_SIZE = len(VOCAB) + 1
-EMBED_DIM = 64
-HIDDEN_DIM = 64
-OUTPUT_DIM = 1
-DROPOUT = 0.5
-MODEL_PATH = 'Models_MPNN_immunoClassifier_final.pt'
-
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-print(f"Using device: {device}")
-
-model = MPNNClassifier(
-    vocab_size=VOCAB_SIZE,
-    embed_dim=EMBED_DIM,
-    hidden_dim=HIDDEN_DIM,
-    output_dim=OUTPUT_DIM,
-    dropout=DROPOUT
-)
 
-try:
-    model.load_state_dict(torch.load(MODEL_PATH, map_location=device))
-    model.to(device)
-    model.eval()
-    print("Model loaded successfully.")
-except FileNotFoundError:
-    print(f"FATAL ERROR: Model file not found at {MODEL_PATH}")
-    exit()
+# Batching settings: /predict/batch accepts at most MAX_BATCH_SEQUENCES sequences, and concurrent
+# single /predict calls are grouped for up to MICRO_BATCH_MAX_WAIT_MS into batches of MICRO_BATCH_MAX_SIZE.
+MAX_BATCH_SEQUENCES = int(os.environ.get('PREDICT_MAX_BATCH_SEQUENCES', 1024))
+MICRO_BATCH_MAX_SIZE = int(os.environ.get('MICRO_BATCH_MAX_SIZE', 32))
+MICRO_BATCH_MAX_WAIT_MS = float(os.environ.get('MICRO_BATCH_MAX_WAIT_MS', 5))
+
+# Result cache: predictions and validations are keyed by the normalized sequence and the checkpoint
+# identity; the cache is cleared whenever the runtime reloads a changed checkpoint.
+RESULT_CACHE_SIZE = int(os.environ.get('PREDICT_CACHE_SIZE', 16384))
+RESULT_CACHE_TTL = float(os.environ.get('PREDICT_CACHE_TTL', 3600))
+
+result_cache = LRUTTLCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL)
+
+# /similar returns at most MAX_SIMILAR_K neighbours from the precomputed corpus embeddings.
+MAX_SIMILAR_K = 100
+
+# /predict/mutagenesis scores at most MUTAGENESIS_MAX_MUTANTS mutants per request, in forward passes of
+# MUTAGENESIS_BATCH_SIZE, and stops scoring after MUTAGENESIS_TIME_BUDGET seconds.
+MUTAGENESIS_MAX_MUTANTS = int(os.environ.get('MUTAGENESIS_MAX_MUTANTS', 50000))
+MUTAGENESIS_BATCH_SIZE = 1024
+MUTAGENESIS_TIME_BUDGET = float(os.environ.get('MUTAGENESIS_TIME_BUDGET', 10))
+
+# The standalone model server (model_server.py) turns this on to keep its override of likely false
+# positives: complex N-glycans scored above 0.9 without an AlphaGal or Neu5Gc motif.
+OVERRIDE_FALSE_POSITIVES = os.environ.get('PREDICT_OVERRIDE_FALSE_POSITIVES', '0') == '1'
+
+def _on_model_reload():
+    result_cache.clear()
+    EMBEDDING_INDEX.reset()
+
+def _load_runtime():
+    # torch, torch_geometric and the checkpoint are only imported/loaded on first use (or by warm-up).
+    from model_runtime import ModelRuntime
+    return ModelRuntime(VOCAB_SIZE, on_reload=_on_model_reload)
+
+def _load_embedding_index():
+    from embedding_index import EmbeddingIndex
+    return EmbeddingIndex.load(RUNTIME.get(), TOKENIZER, process_glycans)
+
+RUNTIME = LazyResource("immunogenicity model", _load_runtime)
+EMBEDDING_INDEX = LazyResource("glycan embedding index", _load_embedding_index)
+
+def current_model_identity():
+    return RUNTIME.get().current_identity()
+
+def normalize_sequence(sequence):
+    return sequence.strip()
+
+# ============================ Inference ====================================
+
+def score_token_lists(token_lists):
+    return RUNTIME.get().score_token_lists(token_lists)
+
+def build_prediction(sequence, score):
+    prediction_label = "Immunogenic" if score >= 0.5 else "Non-Immunogenic"
+    motifs = detect_known_motifs(sequence)
+
+    # Optional: override false positives
+    if OVERRIDE_FALSE_POSITIVES and "ComplexNGlycan" in motifs and score > 0.9 and not any(m in motifs for m in ["AlphaGal", "NonHumanSialicAcid"]):
+        print(f"⚠️ OVERRIDING LIKELY FALSE POSITIVE: {sequence}")
+        prediction_label = "Non-Immunogenic"
+        score = 0.01  # override
+
+    return {
+        "prediction": prediction_label,
+        "score": score,
+        "motifs_detected": motifs
+    }
+
+batcher = MicroBatcher(score_token_lists, max_batch_size=MICRO_BATCH_MAX_SIZE, max_wait_ms=MICRO_BATCH_MAX_WAIT_MS)
 
 # =========================== API Endpoints =================================
 model_api = Blueprint('model_api',__name__)
 @model_api.route('/validate', methods=['POST'])
 def validate_sequence():
     data = request.get_json()
-    sequence = data.get('sequence', '')
+    sequence = normalize_sequence(data.get('sequence', ''))
     if not sequence:
         return jsonify({"valid": False, "reason": "Sequence is empty."}), 400
 
+    cache_key = ('validate', sequence, current_model_identity())
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        return jsonify(cached)
+
     try:
         glycowords = process_glycans([sequence])
         if not glycowords:
-            return jsonify({"valid": False, "reason": "Too short or invalid glycan structure."})
-        string_to_labels(glycowords, VOCAB)
-    except ValueError:
-        return jsonify({"valid": False, "reason": "Unknown glycowords in the sequence."})
+            result = {"valid": False, "reason": "Too short or invalid glycan structure."}
+        else:
+            unknown = TOKENIZER.unknown_glycowords(glycowords)
+            if unknown:
+                result = {
+                    "valid": False,
+                    "reason": "Unknown glycowords in the sequence.",
+                    "unknown_glycowords": ['*'.join(w) for w in unknown]
+                }
+            else:
+                result = {"valid": True}
     except Exception as e:
         return jsonify({"valid": False, "reason": str(e)}), 500
 
-    return jsonify({"valid": True})
+    result_cache.set(cache_key, result)
+    return jsonify(result)
 
 @model_api.route('/predict', methods=['POST'])
 def predict():
     data = request.get_json()
-    sequence = data.get('sequence', '')
+    sequence = normalize_sequence(data.get('sequence', ''))
     if not sequence:
         return jsonify({"error": "No sequence provided"}), 400
 
+    cache_key = ('predict', sequence, current_model_identity())
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        return jsonify(cached)
+
     try:
         glycowords = process_glycans([sequence])
         if not glycowords:
             return jsonify({"error": "Invalid glycan structure or too short to analyze."}), 400
 
-        tokens = string_to_labels(glycowords, VOCAB)
-        graph = sequence_to_graph(tokens)
-        if graph is None:
-            return jsonify({"error": "Could not create a graph from the sequence."}), 400
+        tokens = TOKENIZER.encode_glycowords(glycowords)
+        score = batcher.submit(tokens)
+        result = build_prediction(sequence, score)
+        result_cache.set(cache_key, result)
+        return jsonify(result)
+
+    except ValueError:
+        return jsonify({"error": "Prediction failed due to unknown glycowords."}), 400
+    except Exception as e:
+        print(f"Prediction error: {e}")
+        return jsonify({"error": "An internal error occurred."}), 500
+
+@model_api.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    data = request.get_json()
+    sequences = data.get('sequences', [])
+    if not sequences or not isinstance(sequences, list) or not all(isinstance(s, str) for s in sequences):
+        return jsonify({"error": "Sequences must be a non-empty list of strings."}), 400
+    if len(sequences) > MAX_BATCH_SEQUENCES:
+        return jsonify({"error": f"At most {MAX_BATCH_SEQUENCES} sequences can be scored per request."}), 400
+
+    identity = current_model_identity()
+    sequences = [normalize_sequence(s) for s in sequences]
+    results = [None] * len(sequences)
+    valid_idx, token_lists = [], []
+    for i, sequence in enumerate(sequences):
+        if not sequence:
+            results[i] = {"sequence": sequence, "error": "No sequence provided"}
+            continue
+        cached = result_cache.get(('predict', sequence, identity))
+        if cached is not None:
+            results[i] = {"sequence": sequence, **cached}
+            continue
+        glycowords = process_glycans([sequence])
+        if not glycowords:
+            results[i] = {"sequence": sequence, "error": "Invalid glycan structure or too short to analyze."}
+            continue
+        try:
+            token_lists.append(TOKENIZER.encode_glycowords(glycowords))
+            valid_idx.append(i)
+        except ValueError:
+            results[i] = {"sequence": sequence, "error": "Prediction failed due to unknown glycowords."}
+
+    try:
+        scores = score_token_lists(token_lists) if token_lists else []
+    except Exception as e:
+        print(f"Batch prediction error: {e}")
+        return jsonify({"error": "An internal error occurred."}), 500
 
-        batch = Batch.from_data_list([graph]).to(device)
-        with torch.no_grad():
-            output_logits = model(batch.x, batch.edge_index, batch.batch)
-        score = torch.sigmoid(output_logits).item()
-        prediction_label = "Immunogenic" if score >= 0.5 else "Non-Immunogenic"
+    for i, score in zip(valid_idx, scores):
+        result = build_prediction(sequences[i], score)
+        result_cache.set(('predict', sequences[i], identity), result)
+        results[i] = {"sequence": sequences[i], **result}
+
+    return jsonify({"results": results})
+
+@model_api.route('/predict/cache', methods=['GET'])
+def cache_stats():
+    runtime = RUNTIME.get()
+    return jsonify({
+        "model_checkpoint": runtime.model_path,
+        "model_identity": list(runtime.current_identity()),
+        "inference_backend": runtime.backend,
+        **result_cache.stats()
+    })
+
+@model_api.route('/embed', methods=['POST'])
+def embed():
+    data = request.get_json()
+    sequence = normalize_sequence(data.get('sequence', ''))
+    if not sequence:
+        return jsonify({"error": "No sequence provided"}), 400
+
+    glycowords = process_glycans([sequence])
+    if not glycowords:
+        return jsonify({"error": "Invalid glycan structure or too short to analyze."}), 400
+    try:
+        tokens = TOKENIZER.encode_glycowords(glycowords)
+        embedding = RUNTIME.get().embed_token_lists([tokens])[0]
+    except ValueError:
+        return jsonify({"error": "Embedding failed due to unknown glycowords."}), 400
+    except Exception as e:
+        print(f"Embedding error: {e}")
+        return jsonify({"error": "An internal error occurred."}), 500
+
+    return jsonify({"sequence": sequence, "embedding": embedding.tolist()})
+
+@model_api.route('/similar', methods=['POST'])
+def similar():
+    data = request.get_json()
+    sequence = normalize_sequence(data.get('sequence', ''))
+    if not sequence:
+        return jsonify({"error": "No sequence provided"}), 400
+    try:
+        k = min(max(int(data.get('k', 10)), 1), MAX_SIMILAR_K)
+    except (TypeError, ValueError):
+        return jsonify({"error": "k must be an integer."}), 400
 
-        motifs = detect_known_motifs(sequence)
-     
+    glycowords = process_glycans([sequence])
+    if not glycowords:
+        return jsonify({"error": "Invalid glycan structure or too short to analyze."}), 400
+    try:
+        tokens = TOKENIZER.encode_glycowords(glycowords)
+        embedding = RUNTIME.get().embed_token_lists([tokens])[0]
+        results = EMBEDDING_INDEX.get().top_k(embedding, k)
+    except ValueError:
+        return jsonify({"error": "Similarity search failed due to unknown glycowords."}), 400
+    except Exception as e:
+        print(f"Similarity search error: {e}")
+        return jsonify({"error": "An internal error occurred."}), 500
 
-        return jsonify({
-            "prediction": prediction_label,
-            "score": score,
-            "motifs_detected": motifs
-        })
+    return jsonify({"sequence": sequence, "k": k, "results": results})
 
+@model_api.route('/predict/mutagenesis', methods=['POST'])
+def mutagenesis():
+    data = request.get_json()
+    sequence = normalize_sequence(data.get('sequence', ''))
+    if not sequence:
+        return jsonify({"error": "No sequence provided"}), 400
+    try:
+        n = min(int(data.get('n', 1000)), MUTAGENESIS_MAX_MUTANTS)
+        n_mut = max(int(data.get('n_mut', 1)), 1)
+        top = max(int(data.get('top', 50)), 0)
+        time_budget = min(float(data.get('time_budget', MUTAGENESIS_TIME_BUDGET)), MUTAGENESIS_TIME_BUDGET)
+        seed = data.get('seed')
+        seed = None if seed is None else int(seed)
+    except (TypeError, ValueError):
+        return jsonify({"error": "n, n_mut, top, time_budget and seed must be numbers."}), 400
+    try:
+        weighted = parse_flag(data.get('weighted', False))
     except ValueError:
-        return jsonify({"error": "Prediction failed due to unknown glycowords."}), 400
+        return jsonify({"error": "weighted must be true or false."}), 400
+    unknown = data.get('unknown', 'exclude')
+    if unknown not in UNKNOWN_POLICIES:
+        return jsonify({"error": f"unknown must be one of {list(UNKNOWN_POLICIES)}."}), 400
+
+    try:
+        result = mutagenesis_scan(
+            sequence, TOKENIZER, RUNTIME.get().score_token_lists,
+            n=n, n_mut=n_mut, unknown=unknown, time_budget=time_budget,
+            batch_size=MUTAGENESIS_BATCH_SIZE, top=top, seed=seed, weighted=weighted
+        )
+    except UnknownGlycowordError:
+        return jsonify({"error": "The wild-type sequence contains unknown glycowords."}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        print(f"Prediction error: {e}")
+        print(f"Mutagenesis error: {e}")
         return jsonify({"error": "An internal error occurred."}), 500
+
+    return jsonify(result)
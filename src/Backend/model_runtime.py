@@ -0,0 +1,69 @@
+import os
+import threading
+import time
+
+import torch
+
+from glycan_graph import collate_token_lists
+from immuno_model import MODEL_PATH, load_inference_model
+
+# The checkpoint is re-stat'ed at most every CHECKPOINT_CHECK_INTERVAL seconds and reloaded when it changes.
+CHECKPOINT_CHECK_INTERVAL = 2.0
+
+
+def checkpoint_identity(path):
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+class ModelRuntime:
+    """The loaded immunogenicity model plus everything torch-specific needed to score token lists."""
+
+    def __init__(self, vocab_size, model_path=MODEL_PATH, on_reload=None):
+        self.vocab_size = vocab_size
+        self.model_path = model_path
+        self.on_reload = on_reload
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        print(f"Using device: {self.device}")
+        self.model, self.backend = load_inference_model(model_path, vocab_size, self.device)
+        self.identity = checkpoint_identity(model_path)
+        print(f"Model loaded successfully ({self.backend} backend).")
+        self._lock = threading.Lock()
+        self._last_check = time.monotonic()
+
+    def current_identity(self):
+        """Returns the checkpoint identity, reloading the model (and calling on_reload) if the file changed."""
+        if time.monotonic() - self._last_check < CHECKPOINT_CHECK_INTERVAL:
+            return self.identity
+        with self._lock:
+            if time.monotonic() - self._last_check < CHECKPOINT_CHECK_INTERVAL:
+                return self.identity
+            self._last_check = time.monotonic()
+            try:
+                identity = checkpoint_identity(self.model_path)
+                if identity != self.identity:
+                    print(f"Model checkpoint {self.model_path} changed, reloading...")
+                    self.model, self.backend = load_inference_model(self.model_path, self.vocab_size, self.device)
+                    self.identity = identity
+                    if self.on_reload:
+                        self.on_reload()
+                    print("Model reloaded successfully.")
+            except Exception as e:
+                # Keep serving the old model (e.g. the file is mid-write); the next check retries.
+                print(f"Model reload failed: {e}")
+        return self.identity
+
+    def score_token_lists(self, token_lists):
+        x, edge_index, batch = collate_token_lists(token_lists)
+        model = self.model
+        with torch.no_grad():
+            output_logits = model(x.to(self.device), edge_index.to(self.device), batch.to(self.device))
+        return torch.sigmoid(output_logits).view(-1).tolist()
+
+    def embed_token_lists(self, token_lists):
+        """Pooled MPNN representations, one float32 row per token list."""
+        x, edge_index, batch = collate_token_lists(token_lists)
+        model = self.model
+        with torch.no_grad():
+            embeddings = model.embed(x.to(self.device), edge_index.to(self.device), batch.to(self.device))
+        return embeddings.float().cpu().numpy()
@@ -1,59 +1,171 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+import json
+import os
 import pandas as pd
 from collections import Counter
-import random
+import time
+
+from glycan_scanner import motif_find, scan, small_motif_find, windows
+from lazy_loading import LazyResource
+from mutant_sampler import MutantSampler
+from mutant_space import MutantMotifCounter, MutantSpace
 
 motif_api = Blueprint('motif_api', __name__)
 
 # Load monosaccharides list
-df = pd.read_csv('monosaccharides_counts.csv')
-all_sugars = df['Monosaccharide'].dropna().tolist()
+df = pd.read_csv('monosaccharides_counts.csv').dropna(subset=['Monosaccharide'])
+all_sugars = df['Monosaccharide'].tolist()
+sugar_counts = df['Count'].fillna(0).to_numpy()
 
 all_bonds = ['a1-1', 'a1-2', 'a1-3', 'a1-4', 'a1-5', 'a1-6', 'a1-7', 'a1-8',
              'a2-1', 'a2-2', 'a2-3', 'a2-4', 'a2-5', 'a2-6', 'a2-7', 'a2-8', 'a2-9',
              'b1-1', 'b1-2', 'b1-3', 'b1-4', 'b1-5', 'b1-6', 'b1-7', 'b1-8', 'b1-9',
              'b2-1', 'b2-2', 'b2-3', 'b2-4', 'b2-5', 'b2-6', 'b2-7', 'b2-8']
 
-def motif_find(s):
-    b = [k.replace('[', '').replace(']', '') for k in sum([i.split(')') for i in s.split('(')], [])]
-    return ['*'.join(b[i:i+5]) for i in range(0, len(b)-4, 2)]
-
-def small_motif_find(s):
-    b = [k.replace('[', '').replace(']', '') for k in sum([i.split(')') for i in s.split('(')], [])]
-    return '*'.join(b)
-
-def motif_find_mutate(s, mutate=True, n_mut=1, mode='normal'):
-    b = [k.replace('[', '').replace(']', '') for k in sum([i.split(')') for i in s.split('(')], [])]
-    if mutate:
-        for _ in range(n_mut):
-            idx = random.choice(range(len(b)))
-            if idx % 2 == 0:
-                b[idx] = random.choice(all_sugars)
-            else:
-                b[idx] = random.choice(all_bonds)
-    b_label = '*'.join(b)
-    b_motifs = ['*'.join(b[i:i+5]) for i in range(0, len(b)-4, 2)]
-    return b_motifs, b_label
-
-def process_mutated_glycans(glycan, n_mut=1, n=100, mode='normal'):
-    wt, wt_label = motif_find_mutate(glycan, mutate=False)
-    wt = [i.split('*') for i in wt]
-    glycan_motifs, glycan_labels = zip(*[motif_find_mutate(glycan, n_mut=n_mut, mode=mode) for _ in range(n)])
-    glycan_motifs = [[i.split('*') for i in k] for k in glycan_motifs]
-    return [wt] + glycan_motifs, [wt_label] + list(glycan_labels)
+def _load_glycoword_index():
+    from glycoword_index import GlycowordIndex
+    return GlycowordIndex.load()
+
+GLYCOWORD_INDEX = LazyResource("glycoword inverted index", _load_glycoword_index)
+# /motif/search returns at most MAX_SEARCH_RESULTS glycans (the total count is always reported).
+MAX_SEARCH_RESULTS = 1000
+
+sampler = MutantSampler(all_sugars, all_bonds, sugar_weights=sugar_counts)
+MUTATE_CHUNK_SIZE = 4096
+# Server-side cap on the mutants returned per exhaustive page.
+EXHAUSTIVE_PAGE_LIMIT = int(os.environ.get("MUTATE_EXHAUSTIVE_PAGE_LIMIT", 10000))
+# Largest n of a non-streamed random response, which is built in memory; larger n must stream,
+# up to MUTATE_STREAM_MAX_N.
+MUTATE_MAX_N = int(os.environ.get("MUTATE_MAX_N", 100000))
+MUTATE_STREAM_MAX_N = int(os.environ.get("MUTATE_STREAM_MAX_N", 10000000))
+
+def parse_flag(value):
+    """A JSON boolean or the string "true"/"false"; anything else raises ValueError."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    raise ValueError(f"expected true or false, got {value!r}")
+
+def process_mutated_glycans(glycan, n_mut=1, n=100, seed=None, weighted=False):
+    """Glycowords and '*'-joined labels of the wild type followed by n random mutants."""
+    wt = scan(glycan)
+    motifs, labels = [windows(wt)], ['*'.join(wt)]
+    for rows in sampler.iter_mutants(wt, n, n_mut, seed=seed, weighted=weighted, chunk_size=MUTATE_CHUNK_SIZE):
+        for row in rows.tolist():
+            motifs.append(windows(row))
+            labels.append('*'.join(row))
+    return motifs, labels
+
+def stream_mutated_glycans(wt, chunks):
+    """NDJSON: the wild type, one line per mutant, then the glycoword frequencies over all of them."""
+    motif_freq = Counter(windows(wt))
+    yield json.dumps({"wild_type": '*'.join(wt)}) + "\n"
+    for rows in chunks:
+        lines = []
+        for row in rows.tolist():
+            motif_freq.update(windows(row))
+            lines.append(json.dumps({"mutated_sequence": '*'.join(row)}))
+        yield "\n".join(lines) + "\n"
+    yield json.dumps({"motif_frequencies": {"*".join(k): v for k, v in motif_freq.items()}}) + "\n"
+
+def exhaustive_page(space, cursor, limit):
+    """Walks mutants [cursor, cursor + limit) of the space, counting glycowords as it goes.
+
+    Yields the '*'-joined label of each mutant; the counter holds the page frequencies when done.
+    """
+    counter = MutantMotifCounter(space.wt)
+
+    def labels():
+        for tokens, positions in space.iter_range(cursor, cursor + limit):
+            counter.add(tokens, positions)
+            yield '*'.join(tokens)
+
+    return labels(), counter
+
+def exhaustive_summary(space, cursor, limit, counter):
+    stop = min(cursor + limit, space.total)
+    return {
+        "mode": "exhaustive",
+        "total": space.total,
+        "cursor": cursor,
+        "next_cursor": stop if stop < space.total else None,
+        "motif_frequencies": {"*".join(k): v for k, v in counter.frequencies().items()}
+    }
+
+def mutate_exhaustive(data, wt, stream):
+    try:
+        order = int(data.get("order", 1))
+        cursor = int(data.get("cursor", 0))
+        limit = min(int(data.get("limit", EXHAUSTIVE_PAGE_LIMIT)), EXHAUSTIVE_PAGE_LIMIT)
+        space = MutantSpace(wt, all_sugars, all_bonds, max_order=order)
+    except (TypeError, ValueError):
+        return jsonify({"error": "order must be 1 or 2; cursor and limit must be integers"}), 400
+    if cursor < 0 or limit < 1:
+        return jsonify({"error": "cursor must be >= 0 and limit >= 1"}), 400
+    labels, counter = exhaustive_page(space, cursor, limit)
+
+    if stream:
+        def lines():
+            yield json.dumps({"wild_type": '*'.join(wt)}) + "\n"
+            for label in labels:
+                yield json.dumps({"mutated_sequence": label}) + "\n"
+            yield json.dumps(exhaustive_summary(space, cursor, limit, counter)) + "\n"
+        return Response(stream_with_context(lines()), mimetype="application/x-ndjson")
+
+    mutated = list(labels)
+    return jsonify({
+        **exhaustive_summary(space, cursor, limit, counter),
+        "wild_type": '*'.join(wt),
+        "mutated_sequences": mutated
+    })
 
 @motif_api.route("/motif/mutate", methods=["POST"])
 def mutate():
+    """Random mutants of a glycan and the glycoword frequencies across them.
+
+    Optional body fields: seed (reproducible draws), weighted (draw monosaccharides in proportion
+    to monosaccharides_counts.csv instead of uniformly) and stream (NDJSON response, also chosen
+    with Accept: application/x-ndjson) for large n. n is capped at MUTATE_MAX_N without streaming
+    and at MUTATE_STREAM_MAX_N with it.
+
+    mode="exhaustive" instead enumerates every single mutant (order=2 adds every double mutant)
+    one page at a time: pass the returned next_cursor back as cursor; limit is capped at
+    EXHAUSTIVE_PAGE_LIMIT. Frequencies cover the mutants of the page only.
+    """
     data = request.get_json()
     sequence = data.get("sequence", "")
     if not sequence:
         return jsonify({"error": "No glycan sequence provided"}), 400
-    n_mut = int(data.get("n_mut", 1))
-    n = int(data.get("n", 100))
-    mode = data.get("mode", "normal")
-    motifs, labels = process_mutated_glycans(sequence, n_mut=n_mut, n=n, mode=mode)
-    flat_motifs = [tuple(m) for sublist in motifs for m in sublist]
-    motif_freq = Counter(flat_motifs)
+    try:
+        n_mut = int(data.get("n_mut", 1))
+        n = int(data.get("n", 100))
+        seed = data.get("seed")
+        seed = None if seed is None else int(seed)
+    except (TypeError, ValueError):
+        return jsonify({"error": "n, n_mut and seed must be integers"}), 400
+    if n < 0 or n_mut < 1:
+        return jsonify({"error": "n must be >= 0 and n_mut >= 1"}), 400
+    try:
+        weighted = parse_flag(data.get("weighted", False))
+        stream = parse_flag(data.get("stream", False)) or request.accept_mimetypes.best == "application/x-ndjson"
+    except ValueError:
+        return jsonify({"error": "weighted and stream must be true or false"}), 400
+
+    wt = scan(sequence)
+    if data.get("mode", "normal") == "exhaustive":
+        return mutate_exhaustive(data, wt, stream)
+    if not stream and n > MUTATE_MAX_N:
+        return jsonify({"error": f"n must be <= {MUTATE_MAX_N}; use stream=true for more mutants"}), 400
+    if n > MUTATE_STREAM_MAX_N:
+        return jsonify({"error": f"n must be <= {MUTATE_STREAM_MAX_N}"}), 400
+    n_mut = min(n_mut, len(wt))  # each chunk draws n_mut positions per mutant
+    if stream:
+        chunks = sampler.iter_mutants(wt, n, n_mut, seed=seed, weighted=weighted, chunk_size=MUTATE_CHUNK_SIZE)
+        return Response(stream_with_context(stream_mutated_glycans(wt, chunks)), mimetype="application/x-ndjson")
+
+    motifs, labels = process_mutated_glycans(sequence, n_mut=n_mut, n=n, seed=seed, weighted=weighted)
+    motif_freq = Counter(m for sublist in motifs for m in sublist)
     return jsonify({
         "motif_frequencies": {"*".join(k): v for k, v in motif_freq.items()},
         "mutated_sequences": labels
@@ -70,3 +182,35 @@ def find_motif():
     data = request.get_json()
     sequence = data.get("sequence", "")
     return jsonify({"motifs": motif_find(sequence)})
+
+@motif_api.route("/motif/search", methods=["POST"])
+def search_motif():
+    """Corpus glycans containing all (operator="and") or any (operator="or") of the given motifs.
+
+    Motifs are '*'-joined glycowords as returned by /motif/find or IUPAC-condensed fragments of
+    at least three monosaccharides.
+    """
+    data = request.get_json()
+    motifs = data.get("motifs", data.get("motif", []))
+    if isinstance(motifs, str):
+        motifs = [motifs]
+    if not isinstance(motifs, list) or not all(isinstance(m, str) for m in motifs):
+        return jsonify({"error": "motifs must be a list of strings"}), 400
+    operator = str(data.get("operator", "and")).lower()
+    try:
+        limit = min(max(int(data.get("limit", 100)), 0), MAX_SEARCH_RESULTS)
+    except (TypeError, ValueError):
+        return jsonify({"error": "limit must be an integer"}), 400
+    index = GLYCOWORD_INDEX.get()
+    start = time.perf_counter()
+    try:
+        rows = index.search(motifs, operator)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    query_ms = (time.perf_counter() - start) * 1e3
+    return jsonify({
+        "operator": operator,
+        "count": int(len(rows)),
+        "query_ms": query_ms,
+        "glycans": index.describe(rows[:limit].tolist())
+    })
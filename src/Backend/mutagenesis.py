@@ -0,0 +1,127 @@
+import math
+import time
+
+from glycan_scanner import scan, windows
+from glycoword_tokenizer import UnknownGlycowordError
+from motif_api import sampler
+
+# 'exclude' drops mutants that contain glycowords outside the vocabulary; 'skip' and 'unk' are
+# passed through to GlycowordTokenizer (drop the unknown glycoword / map it to the spare id).
+UNKNOWN_POLICIES = ('exclude', 'skip', 'unk')
+
+
+# Generation and encoding check the deadline every DEADLINE_CHECK_EVERY mutants.
+DEADLINE_CHECK_EVERY = 256
+
+
+def _expired(i, deadline):
+    return deadline is not None and i % DEADLINE_CHECK_EVERY == 0 and time.monotonic() >= deadline
+
+
+def generate_unique_mutants(wt_tokens, n, n_mut=1, deadline=None, seed=None, weighted=False):
+    """Samples n random mutants with motif_api's MutantSampler, keeping the first occurrence of each
+    distinct one (never the wild type).
+
+    Returns (tokens, changed_positions) pairs, and whether sampling stopped early at `deadline`
+    (a time.monotonic() value).
+    """
+    seen = {tuple(wt_tokens)}
+    mutants = []
+    chunks = sampler.iter_mutants(wt_tokens, n, n_mut, seed=seed, weighted=weighted, chunk_size=DEADLINE_CHECK_EVERY)
+    for rows in chunks:
+        if deadline is not None and time.monotonic() >= deadline:
+            return mutants, True
+        for tokens in rows.tolist():
+            key = tuple(tokens)
+            if key in seen:
+                continue
+            seen.add(key)
+            mutants.append((tokens, [p for p, (a, b) in enumerate(zip(tokens, wt_tokens)) if a != b]))
+    return mutants, False
+
+
+def mutagenesis_scan(sequence, tokenizer, score_token_lists, n=1000, n_mut=1, unknown='exclude',
+                     time_budget=10.0, batch_size=1024, top=50, seed=None, weighted=False):
+    """Scores the wild type and up to n unique random mutants in batched forward passes.
+
+    `time_budget` covers sampling, encoding and scoring: each stops once it runs out (reported as
+    truncated), scoring at the next batch boundary. n_mut is capped at the token count. seed and
+    weighted are passed to the sampler as in /motif/mutate. Each mutant's score delta is attributed
+    to every position it changes.
+    """
+    deadline = time.monotonic() + time_budget
+    wt_tokens = scan(sequence)
+    wt_glycowords = windows(wt_tokens)
+    if not wt_glycowords:
+        raise ValueError("Invalid glycan structure or too short to analyze.")
+    wt_score = score_token_lists([tokenizer.encode_glycowords(wt_glycowords, unknown='error')])[0]
+    wt_immunogenic = wt_score >= 0.5
+
+    n_mut = min(n_mut, len(wt_tokens))
+    mutants, truncated = generate_unique_mutants(wt_tokens, n, n_mut, deadline, seed, weighted)
+    policy = 'error' if unknown == 'exclude' else unknown
+    encoded, n_unscorable = [], 0
+    for i, (tokens, positions) in enumerate(mutants):
+        if _expired(i, deadline):
+            truncated = True
+            break
+        try:
+            ids = tokenizer.encode_glycowords(windows(tokens), unknown=policy)
+        except UnknownGlycowordError:
+            ids = None
+        if not ids:
+            n_unscorable += 1
+            continue
+        encoded.append((tokens, positions, ids))
+
+    scored = []
+    for i in range(0, len(encoded), batch_size):
+        if time.monotonic() >= deadline:
+            truncated = True
+            break
+        chunk = encoded[i:i + batch_size]
+        scores = score_token_lists([ids for _, _, ids in chunk])
+        scored.extend((tokens, positions, score) for (tokens, positions, _), score in zip(chunk, scores))
+
+    per_position = {}
+    for tokens, positions, score in scored:
+        delta = score - wt_score
+        for p in positions:
+            stats = per_position.setdefault(p, {
+                "position": p,
+                "wild_type": wt_tokens[p],
+                "kind": "monosaccharide" if p % 2 == 0 else "linkage",
+                "n_mutants": 0,
+                "mean_delta": 0.0,
+                "min_delta": math.inf,
+                "max_delta": -math.inf,
+                "n_flipped": 0
+            })
+            stats["n_mutants"] += 1
+            stats["mean_delta"] += delta
+            stats["min_delta"] = min(stats["min_delta"], delta)
+            stats["max_delta"] = max(stats["max_delta"], delta)
+            stats["n_flipped"] += (score >= 0.5) != wt_immunogenic
+    for stats in per_position.values():
+        stats["mean_delta"] /= stats["n_mutants"]
+
+    strongest = sorted(scored, key=lambda m: abs(m[2] - wt_score), reverse=True)[:top]
+    return {
+        "wild_type": {
+            "sequence": sequence,
+            "score": wt_score,
+            "prediction": "Immunogenic" if wt_immunogenic else "Non-Immunogenic"
+        },
+        "n_requested": n,
+        "n_unique": len(mutants),
+        "n_unscorable": n_unscorable,
+        "n_scored": len(scored),
+        "truncated": truncated,
+        "positions": [per_position[p] for p in sorted(per_position)],
+        "mutants": [{
+            "mutated_sequence": '*'.join(tokens),
+            "positions": positions,
+            "score": score,
+            "delta": score - wt_score
+        } for tokens, positions, score in strongest]
+    }
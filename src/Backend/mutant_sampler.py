@@ -0,0 +1,81 @@
+"""Vectorized random mutant generation for /motif/mutate.
+
+Mutation positions and replacement tokens are drawn as whole (chunk, n_mut) arrays from one
+NumPy Generator (reproducible with a seed), one chunk at a time, and each chunk is materialized
+into mutated token rows before the next is drawn, so memory stays bounded while callers stream. Monosaccharide replacements are drawn uniformly, or in proportion
+to their corpus counts through a Vose alias table (O(1) per draw).
+"""
+import numpy as np
+
+
+class AliasTable:
+    def __init__(self, weights):
+        p = np.asarray(weights, dtype=np.float64)
+        if p.ndim != 1 or not len(p) or (p < 0).any() or p.sum() <= 0:
+            raise ValueError("weights must be a non-empty, non-negative vector with a positive sum")
+        n = len(p)
+        scaled = p * n / p.sum()
+        self.prob = np.ones(n)
+        self.alias = np.arange(n)
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] += scaled[s] - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+        # Whatever is left over is 1 up to rounding error and keeps prob 1.
+
+    def __len__(self):
+        return len(self.prob)
+
+    def sample(self, rng, size):
+        columns = rng.integers(0, len(self.prob), size=size)
+        return np.where(rng.random(size) < self.prob[columns], columns, self.alias[columns])
+
+
+class MutantSampler:
+    def __init__(self, sugars, bonds, sugar_weights=None):
+        self.sugars = np.asarray(sugars, dtype=object)
+        self.bonds = np.asarray(bonds, dtype=object)
+        self.sugar_alias = AliasTable(sugar_weights) if sugar_weights is not None else None
+
+    def sample(self, n, length, n_mut=1, seed=None, weighted=False):
+        """Draws the positions and replacement tokens of n mutants of a `length`-token glycan.
+
+        Returns (positions, replacements), both shaped (n, n_mut). Even positions are
+        monosaccharides, odd positions linkages.
+        """
+        if weighted and self.sugar_alias is None:
+            raise ValueError("weighted sampling needs sugar_weights")
+        return self._draw(np.random.default_rng(seed), n, length, n_mut, weighted)
+
+    def _draw(self, rng, n, length, n_mut, weighted):
+        shape = (n, n_mut)
+        positions = rng.integers(0, length, size=shape)
+        if weighted:
+            sugar_ids = self.sugar_alias.sample(rng, shape)
+        else:
+            sugar_ids = rng.integers(0, len(self.sugars), size=shape)
+        bond_ids = rng.integers(0, len(self.bonds), size=shape)
+        replacements = np.where(positions % 2 == 0, self.sugars[sugar_ids], self.bonds[bond_ids])
+        return positions, replacements
+
+    def iter_mutants(self, wt_tokens, n, n_mut=1, seed=None, weighted=False, chunk_size=4096):
+        """Yields (n_chunk, len(wt_tokens)) object arrays of mutated tokens, n rows in total.
+
+        Mutations of one mutant are applied in order, so a position hit twice keeps the last draw.
+        Each chunk is drawn only when it is requested.
+        """
+        if weighted and self.sugar_alias is None:
+            raise ValueError("weighted sampling needs sugar_weights")
+        rng = np.random.default_rng(seed)
+        wt = np.asarray(wt_tokens, dtype=object)
+        for start in range(0, n, chunk_size):
+            pos, rep = self._draw(rng, min(chunk_size, n - start), len(wt_tokens), n_mut, weighted)
+            rows = np.tile(wt, (len(pos), 1))
+            index = np.arange(len(pos))
+            for j in range(n_mut):
+                rows[index, pos[:, j]] = rep[:, j]
+            yield rows
@@ -0,0 +1,81 @@
+"""Exhaustive enumeration of a glycan's single (and optionally double) substitution mutants.
+
+The space is never materialized: every mutant has an integer index (singles first, then doubles
+ordered by position pair) that is decoded on demand with prefix sums over the per-position
+alternative counts, so clients can page through it with a cursor.
+"""
+from bisect import bisect_right
+from collections import Counter
+from itertools import accumulate
+
+from glycan_scanner import windows
+
+
+class MutantSpace:
+    def __init__(self, wt_tokens, sugars, bonds, max_order=1):
+        if max_order not in (1, 2):
+            raise ValueError("max_order must be 1 or 2")
+        self.wt = list(wt_tokens)
+        sugars, bonds = list(dict.fromkeys(sugars)), list(dict.fromkeys(bonds))
+        # Even positions are monosaccharides, odd positions linkages; the wild-type token is not a mutant.
+        self.choices = [[t for t in (sugars if p % 2 == 0 else bonds) if t != token]
+                        for p, token in enumerate(self.wt)]
+        sizes = [len(c) for c in self.choices]
+        self.single_offsets = list(accumulate(sizes, initial=0))
+        self.n_single = self.single_offsets[-1]
+        n = len(self.wt)
+        self.pairs = [(p, q) for p in range(n) for q in range(p + 1, n)] if max_order == 2 else []
+        self.pair_offsets = list(accumulate((sizes[p] * sizes[q] for p, q in self.pairs), initial=0))
+        self.total = self.n_single + self.pair_offsets[-1]
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, k):
+        """(tokens, mutated_positions) of mutant number k."""
+        if not 0 <= k < self.total:
+            raise IndexError(k)
+        tokens = list(self.wt)
+        if k < self.n_single:
+            p = bisect_right(self.single_offsets, k) - 1
+            tokens[p] = self.choices[p][k - self.single_offsets[p]]
+            return tokens, (p,)
+        k -= self.n_single
+        block = bisect_right(self.pair_offsets, k) - 1
+        p, q = self.pairs[block]
+        i, j = divmod(k - self.pair_offsets[block], len(self.choices[q]))
+        tokens[p] = self.choices[p][i]
+        tokens[q] = self.choices[q][j]
+        return tokens, (p, q)
+
+    def iter_range(self, start=0, stop=None):
+        stop = self.total if stop is None else min(stop, self.total)
+        for k in range(max(start, 0), stop):
+            yield self[k]
+
+
+class MutantMotifCounter:
+    """Glycoword frequencies over mutants of one wild type, updated incrementally.
+
+    A substitution only changes the glycowords whose 5-token window covers it, so each mutant
+    costs a handful of window updates instead of re-counting the whole glycan.
+    """
+
+    def __init__(self, wt_tokens):
+        self.wt_windows = windows(wt_tokens)
+        self.wt_counts = Counter(self.wt_windows)
+        self.n_tokens = len(wt_tokens)
+        self.n_mutants = 0
+        self.delta = Counter()
+
+    def add(self, tokens, positions):
+        self.n_mutants += 1
+        starts = {i for p in positions for i in range(max(p - 4, 0), min(p, self.n_tokens - 5) + 1) if i % 2 == 0}
+        for i in starts:
+            self.delta[self.wt_windows[i // 2]] -= 1
+            self.delta[tuple(tokens[i:i+5])] += 1
+
+    def frequencies(self):
+        counts = Counter({w: c * self.n_mutants for w, c in self.wt_counts.items()})
+        counts.update(self.delta)
+        return {w: c for w, c in counts.items() if c > 0}
@@ -1,9 +1,10 @@
 from flask import Flask, Blueprint, request, jsonify
 from flask_cors import CORS  # Import CORS
-from glycowork.network.biosynthesis import construct_network
-from glycowork.glycan_data.loader import lib
 import traceback # For detailed error logging
 
+from job_queue import async_job
+from lazy_loading import LazyResource, lazy_import
+
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes, adjust for production if needed
@@ -14,12 +15,19 @@ network_api = Blueprint('network_api', __name__, url_prefix='/api') # Added url_
 # Get all unique PTMs from the library for frontend options
 # This might be extensive, so you might want to curate a smaller default list for performance
 # or provide a more targeted list relevant to common biosynthetic pathways.
-try:
-    ALL_AVAILABLE_PTMS = sorted(list(set(lib.ptm_dict.keys()))) # Ensure uniqueness and sort
-except AttributeError: # Fallback if lib.ptm_dict is not as expected
-    print("Warning: lib.ptm_dict not found or structured as expected. Using empty PTM list.")
-    ALL_AVAILABLE_PTMS = []
-    
+# glycowork's biosynthesis module and library are imported on first use (or by the warm-up thread).
+BIOSYNTHESIS = lazy_import("glycowork.network.biosynthesis")
+
+def _load_available_ptms():
+    from glycowork.glycan_data.loader import lib
+    try:
+        return sorted(list(set(lib.ptm_dict.keys()))) # Ensure uniqueness and sort
+    except AttributeError: # Fallback if lib.ptm_dict is not as expected
+        print("Warning: lib.ptm_dict not found or structured as expected. Using empty PTM list.")
+        return []
+
+ALL_AVAILABLE_PTMS = LazyResource("glycowork PTM list", _load_available_ptms)
+
 DEFAULT_PTMS = {'4Ac', '1P', 'OAc', '6S', '3P', 'OS', '6P', '3S'}
 DEFAULT_ROOTS = ['Gal(b1-4)GlcNAc-ol', 'Gal(b1-4)Glc-ol']
 AVAILABLE_EDGE_TYPES = ['monolink', 'full_reaction', 'enzyme'] # Common glycowork options
@@ -28,13 +36,14 @@ AVAILABLE_EDGE_TYPES = ['monolink', 'full_reaction', 'enzyme'] # Common glycowor
 def get_network_parameters():
     """Returns available parameters for network construction."""
     return jsonify({
-        "available_ptms": ALL_AVAILABLE_PTMS,
+        "available_ptms": ALL_AVAILABLE_PTMS.get(),
         "default_ptms": list(DEFAULT_PTMS),
         "default_roots": DEFAULT_ROOTS,
         "available_edge_types": AVAILABLE_EDGE_TYPES
     })
 
 @network_api.route("/network", methods=["POST"])
+@async_job("network", concurrency=2)
 def generate_network_enhanced():
     if not request.is_json:
         return jsonify({"error": "Request must be JSON"}), 400
@@ -51,7 +60,8 @@ def generate_network_enhanced():
         allowed_ptms = DEFAULT_PTMS
     else:
         # Filter against all available PTMs to prevent arbitrary input if desired, though glycowork might handle invalid ones.
-        allowed_ptms = set(ptm for ptm in allowed_ptms_req if ptm in ALL_AVAILABLE_PTMS or ptm in DEFAULT_PTMS) # Or be more strict
+        available_ptms = ALL_AVAILABLE_PTMS.get()
+        allowed_ptms = set(ptm for ptm in allowed_ptms_req if ptm in available_ptms or ptm in DEFAULT_PTMS) # Or be more strict
         if not allowed_ptms and allowed_ptms_req: # If user provided some PTMs but none were valid
              allowed_ptms = set() # Allow empty PTM set if user explicitly sends empty or invalid ones
 
@@ -97,7 +107,7 @@ def generate_network_enhanced():
 
     try:
         print(f"Constructing network with: glycans={len(glycans_input_filtered)}, ptms={allowed_ptms}, roots={permitted_roots}, edge_type='{edge_type}'")
-        network = construct_network(
+        network = BIOSYNTHESIS.get().construct_network(
             glycans=glycans_input_filtered,
             allowed_ptms=allowed_ptms, # Must be a set or list
             edge_type=edge_type,
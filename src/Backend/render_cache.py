@@ -0,0 +1,142 @@
+"""Content-addressed cache of rendered glycan images.
+
+A render is identified by the SHA-256 of everything that determines its bytes: the canonical
+glycan, the highlighted motif, the output format and options, and the glycowork version. That
+digest is the cache key, the file name under cache/renders/ and the HTTP ETag, so a client
+revalidating with If-None-Match can be answered before anything is rendered or read.
+
+The disk tier is bounded like the memory one: every RENDER_DISK_PRUNE_EVERY writes, files older
+than RENDER_DISK_MAX_AGE are deleted, then the least recently used (disk hits refresh the mtime)
+until the directory is under RENDER_DISK_MAX_BYTES.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from artifact_cache import atomic_write, cache_path
+from iupac_cache import glycowork_version
+from result_cache import LRUTTLCache
+
+RENDER_FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+RENDER_CACHE_SIZE = int(os.environ.get("RENDER_CACHE_SIZE", 512))
+RENDER_DISK_MAX_BYTES = int(os.environ.get("RENDER_DISK_MAX_BYTES", 512 * 1024 * 1024))
+RENDER_DISK_MAX_AGE = float(os.environ.get("RENDER_DISK_MAX_AGE", 30 * 24 * 3600))
+RENDER_DISK_PRUNE_EVERY = int(os.environ.get("RENDER_DISK_PRUNE_EVERY", 256))
+
+
+def render_key(glycan, motif=None, fmt='png', **options):
+    spec = {"glycan": glycan, "motif": motif, "format": fmt, "options": options, "glycowork": glycowork_version()}
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+class RenderCache:
+    def __init__(self, directory="renders", maxsize=RENDER_CACHE_SIZE, max_bytes=RENDER_DISK_MAX_BYTES,
+                 max_age=RENDER_DISK_MAX_AGE, prune_every=RENDER_DISK_PRUNE_EVERY):
+        self.directory = directory
+        self.memory = LRUTTLCache(maxsize=maxsize)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.prune_every = prune_every
+        self._lock = threading.Lock()
+        self._prune_lock = threading.Lock()
+        # Prune on the first write, so files left by earlier runs count against the limit too.
+        self._writes_until_prune = 1
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self.disk_evictions = 0
+
+    def _path(self, key, fmt):
+        # Two-character fan-out keeps directories small for large render sets.
+        return os.path.join(cache_path(self.directory), key[:2], f"{key}.{fmt}")
+
+    def get(self, key, fmt):
+        data = self.memory.get(key)
+        if data is not None:
+            return data
+        path = self._path(key, fmt)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.disk_misses += 1
+            return None
+        with self._lock:
+            self.disk_hits += 1
+        self.memory.set(key, data)
+        return data
+
+    def set(self, key, fmt, data):
+        path = self._path(key, fmt)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        def write(tmp_path):
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+
+        atomic_write(path, write)
+        self.memory.set(key, data)
+        with self._lock:
+            self._writes_until_prune -= 1
+            due = self._writes_until_prune <= 0
+            if due:
+                self._writes_until_prune = self.prune_every
+        if due:
+            self.prune()
+
+    def prune(self):
+        """Deletes expired renders, then the least recently used ones down to max_bytes."""
+        if not self._prune_lock.acquire(blocking=False):
+            return  # another thread is already pruning
+        try:
+            files = []
+            for root, _, names in os.walk(cache_path(self.directory)):
+                for name in names:
+                    if name.endswith(".tmp"):
+                        continue  # a write in progress
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((st.st_mtime, st.st_size, path))
+            files.sort()
+            total = sum(size for _, size, _ in files)
+            expired_before = time.time() - self.max_age
+            evicted = 0
+            for mtime, size, path in files:
+                if mtime >= expired_before and total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue  # removed by another process
+                total -= size
+                evicted += 1
+            with self._lock:
+                self.disk_evictions += evicted
+        finally:
+            self._prune_lock.release()
+
+    def get_or_render(self, key, fmt, render):
+        """Cached bytes for `key`, else render() stored under it."""
+        data = self.get(key, fmt)
+        if data is None:
+            data = render()
+            self.set(key, fmt, data)
+        return data
+
+    def stats(self):
+        memory = self.memory.stats()
+        lookups = memory["hits"] + memory["misses"]
+        return {
+            "memory": memory,
+            "disk": {"hits": self.disk_hits, "misses": self.disk_misses, "evictions": self.disk_evictions},
+            "hit_rate": (memory["hits"] + self.disk_hits) / lookups if lookups else 0.0
+        }
+
+
+RENDERS = RenderCache()
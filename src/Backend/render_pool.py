@@ -0,0 +1,412 @@
+"""Process-isolated rendering for /api/draw, /api/draw/batch and /api/characterize.
+
+glycowork's GlycoDraw and characterize_monosaccharide draw into pyplot's process-global current
+figure, so two renders in one process at the same time corrupt each other. Every render
+therefore runs in a spawn worker process that draws one image at a time, with its own glycowork
+and matplotlib state; web threads only wait for the bytes, so any number of them can render in
+parallel. With RENDER_WORKERS=0 renders run in-process, serialized by a lock.
+
+A pool whose worker died (a crash in native RDKit/matplotlib code, an OOM kill) or whose render
+exceeded RENDER_TIMEOUT is retired and the next render gets a fresh pool. A retired pool is shut
+down and its workers are killed RENDER_TIMEOUT later, so a hung render does not hold a worker
+forever while renders already running on the other workers can still finish.
+
+Batch renders are cut into chunks and go through the shared render cache. They run on a
+separate, smaller pool and keep at most RENDER_BATCH_IN_FLIGHT chunks submitted at a time, so a
+large batch never queues ahead of single /api/draw and /api/characterize renders. A batch chunk's
+timeout counts from when the pool hands it to a worker, not while it waits behind other batches,
+and a chunk that is only queued never retires the pool. Results come
+back in input order, as a streamed zip (one file per glycan plus index.json) or a PNG sprite
+sheet with a JSON index of each glycan's box.
+
+Run from src/Backend (input: one glycan per line, optionally a tab and a motif to highlight):
+    python render_pool.py glycans.txt drawings.zip --format svg
+    python render_pool.py glycans.txt sheet.png --sprite      # writes sheet.png + sheet.json
+"""
+import argparse
+import io
+import json
+import math
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import warnings
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+
+import matplotlib
+matplotlib.use('Agg')  # Use non-interactive backend
+import matplotlib.pyplot as plt
+
+from iupac_cache import canonical_iupac
+from lazy_loading import lazy_import
+from render_cache import RENDER_FORMATS, RENDERS, render_key
+
+# Suppress interactive backend warning
+warnings.filterwarnings("ignore", message=".*FigureCanvasAgg is non-interactive.*")
+
+GLYCO_DRAW = lazy_import("glycowork.motif.draw")
+
+ANALYSIS = lazy_import("glycowork.motif.analysis")
+
+RENDER_WORKERS = int(os.environ.get('RENDER_WORKERS', os.cpu_count() or 1))
+RENDER_CHUNK_SIZE = int(os.environ.get('RENDER_CHUNK_SIZE', 8))
+# Workers of the batch pool, and chunks one batch may have submitted to it at once.
+RENDER_BATCH_WORKERS = int(os.environ.get('RENDER_BATCH_WORKERS', max(1, RENDER_WORKERS // 2) if RENDER_WORKERS > 0 else 0))
+RENDER_BATCH_IN_FLIGHT = int(os.environ.get('RENDER_BATCH_IN_FLIGHT', 2 * max(1, RENDER_BATCH_WORKERS)))
+# Seconds a single render may wait for and run on the pool (per glycan for batch chunks, counted
+# from when the chunk starts).
+RENDER_TIMEOUT = float(os.environ.get('RENDER_TIMEOUT', 120))
+# Seconds render_batch waits on a chunk that has not started before checking again.
+RENDER_QUEUED_POLL = 1.0
+
+# True inside pool workers, which render directly instead of submitting to a pool of their own.
+_in_render_worker = False
+# Serializes pyplot use when rendering in-process (RENDER_WORKERS=0).
+_pyplot_lock = threading.Lock()
+
+
+def _figure_bytes(fig, fmt, **savefig_kwargs):
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt, **savefig_kwargs)
+    return buf.getvalue()
+
+
+def render_glycan(glycan, motif=None, fmt='png'):
+    plt.close('all')
+    try:
+        drawing = GLYCO_DRAW.get().GlycoDraw(draw_this=glycan, highlight_motif=motif)
+        if fmt == 'svg' and hasattr(drawing, 'as_svg'):
+            return drawing.as_svg().encode('utf-8')
+        return _figure_bytes(plt.gcf(), fmt, bbox_inches='tight')
+    finally:
+        plt.close('all')
+
+
+def render_characterization(sugar, rank=None, focus=None, modifications=False, thresh=10):
+    """PNG of glycowork's characterize_monosaccharide plots for one monosaccharide."""
+    plt.close('all')
+    try:
+        plt.figure(figsize=(10, 6))
+        ANALYSIS.get().characterize_monosaccharide(sugar, rank=rank, focus=focus, modifications=modifications,
+                                                   thresh=thresh)
+        return _figure_bytes(plt.gcf(), 'png')
+    finally:
+        plt.close('all')
+
+
+def run_render(render, *args):
+    """Runs a pyplot-based render function isolated from every other render and returns its bytes."""
+    if _in_render_worker:
+        return render(*args)
+    if RENDER_WORKERS <= 0:
+        with _pyplot_lock:
+            return render(*args)
+    future, pool = _submit('interactive', render, *args)
+    try:
+        return future.result(timeout=RENDER_TIMEOUT)
+    except BrokenProcessPool:
+        retire_pool('interactive', pool)
+        raise BrokenProcessPool("The render worker exited unexpectedly; please try again.") from None
+    except TimeoutError:
+        if not future.cancel():
+            retire_pool('interactive', pool)  # the render started and may be hung
+        raise TimeoutError(f"Rendering did not finish within {RENDER_TIMEOUT:g} s") from None
+
+
+def cached_render(glycan, motif, fmt):
+    """(etag, render thunk) for a glycan; the key uses the canonical form so equivalent spellings share a render."""
+    try:
+        glycan = canonical_iupac(glycan)
+    except Exception:
+        pass  # GlycoDraw reports unparseable input itself
+    key = render_key(glycan, motif, fmt)
+    return key, lambda: RENDERS.get_or_render(key, fmt, lambda: run_render(render_glycan, glycan, motif, fmt))
+
+
+def render_chunk(items, fmt):
+    """Runs in a pool worker: (index, glycan, motif) -> (index, image bytes or None, error)."""
+    out = []
+    for index, glycan, motif in items:
+        try:
+            _, render = cached_render(glycan, motif, fmt)
+            out.append((index, render(), ""))
+        except Exception as e:
+            out.append((index, None, f"Failed to draw glycan. Details: {str(e)}"))
+    return out
+
+
+def _init_render_worker():
+    global _in_render_worker
+    _in_render_worker = True
+
+
+# name -> (pid, pool): the interactive and batch pools of this process.
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+def new_render_pool(workers=RENDER_WORKERS):
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=_init_render_worker)
+
+
+def _shared_pool(name, workers):
+    with _pool_lock:
+        pid, pool = _pools.get(name, (None, None))
+        if pool is None or pid != os.getpid():
+            pool = new_render_pool(workers)
+            _pools[name] = (os.getpid(), pool)
+        return pool
+
+
+def render_pool():
+    """The pool for single renders of this process, created on first use (and again after a fork or retire)."""
+    return _shared_pool('interactive', RENDER_WORKERS)
+
+
+def batch_render_pool():
+    """The pool /api/draw/batch renders on, separate from render_pool()."""
+    return _shared_pool('batch', RENDER_BATCH_WORKERS)
+
+
+def _submit(name, fn, *args):
+    """Submits to the named shared pool as it is now; returns (future, pool).
+
+    A pool that another thread's render broke, or that another request already retired (shut down),
+    is replaced once.
+    """
+    get_pool = batch_render_pool if name == 'batch' else render_pool
+    pool = get_pool()
+    try:
+        return pool.submit(fn, *args), pool
+    except RuntimeError:  # BrokenProcessPool, or "cannot schedule new futures after shutdown"
+        retire_pool(name, pool)
+        pool = get_pool()
+        return pool.submit(fn, *args), pool
+
+
+def _kill_workers(processes):
+    for process in processes:
+        if process.is_alive():
+            process.kill()
+
+
+def retire_pool(name, pool):
+    """Replaces a broken or hung shared pool; its workers are killed once the others had RENDER_TIMEOUT to finish."""
+    with _pool_lock:
+        if _pools.get(name, (None, None))[1] is not pool:
+            return  # already retired by another thread
+        del _pools[name]
+    # shutdown() drops the pool's process table, so take the workers first.
+    processes = list((getattr(pool, '_processes', None) or {}).values())
+    pool.shutdown(wait=False)
+    killer = threading.Timer(RENDER_TIMEOUT, _kill_workers, (processes,))
+    killer.daemon = True
+    killer.start()
+
+
+def shutdown_render_pools():
+    with _pool_lock:
+        pools = [pool for _, pool in _pools.values()]
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown()
+
+
+def _failed_chunk(chunk, error):
+    future = Future()
+    future.set_result([(index, None, f"Failed to draw glycan. Details: {error}") for index, _, _ in chunk])
+    return future
+
+
+def render_batch(items, fmt='png', chunk_size=RENDER_CHUNK_SIZE, in_flight=RENDER_BATCH_IN_FLIGHT):
+    """Yields (index, image bytes or None, error) for each (glycan, motif) item, in input order."""
+    tasks = [(i, glycan.strip(), motif) for i, (glycan, motif) in enumerate(items)]
+    chunks = (tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size))
+    if RENDER_BATCH_WORKERS <= 0:
+        for chunk in chunks:
+            yield from render_chunk(chunk, fmt)  # run_render isolates each render
+        return
+
+    def submit(chunk):
+        """(future, the pool it runs on)"""
+        return _submit('batch', render_chunk, chunk, fmt)
+
+    # (future, pool, chunk, retried). Chunks are submitted as earlier ones finish instead of all at
+    # once, so concurrent batches share the pool.
+    pending = deque()
+    # future -> when it was first seen running. The executor marks a future running once it is
+    # handed to the workers' call queue, which holds at most one call more than there are workers.
+    started = {}
+    try:
+        while True:
+            for chunk in islice(chunks, max(0, max(1, in_flight) - len(pending))):
+                pending.append((*submit(chunk), chunk, False))
+            if not pending:
+                return
+            now = time.monotonic()
+            for f, _, _, _ in pending:
+                if f not in started and (f.running() or f.done()):
+                    started[f] = now
+            future, owner, chunk, retried = pending[0]
+            if future in started:
+                timeout = max(0.0, started[future] + RENDER_TIMEOUT * len(chunk) - now)
+            else:
+                timeout = RENDER_QUEUED_POLL
+            try:
+                results = future.result(timeout=timeout)
+            except (BrokenProcessPool, TimeoutError) as e:
+                hung = isinstance(e, TimeoutError)
+                if hung and future not in started:
+                    continue  # still queued behind other work on the pool
+                retire_pool('batch', owner)
+                pool = batch_render_pool()
+                # Chunks that did not finish may have gone down with that pool: each is run once more
+                # on the new one, except the chunk that hung, which would only hang again.
+                error = f"Rendering did not finish within {RENDER_TIMEOUT * len(chunk):g} s" if hung \
+                    else "The render worker exited unexpectedly."
+                requeued = deque()
+                for i, (f, p, c, r) in enumerate(pending):
+                    if (f.done() and not f.cancelled() and f.exception() is None) or p is pool:
+                        requeued.append((f, p, c, r))
+                    elif r or (hung and i == 0):
+                        f.cancel()
+                        requeued.append((_failed_chunk(c, error), None, c, True))
+                    else:
+                        f.cancel()
+                        requeued.append((*submit(c), c, True))
+                pending = requeued
+                live = {f for f, _, _, _ in pending}
+                started = {f: t for f, t in started.items() if f in live}
+                continue
+            pending.popleft()
+            started.pop(future, None)
+            yield from results
+    finally:
+        for future, _, _, _ in pending:
+            future.cancel()  # the client went away
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Write-only sink zipfile writes into; stream_zip drains it after every member."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_zip(items, results, fmt):
+    """Yields the bytes of a zip holding <index>.<fmt> per rendered glycan and index.json."""
+    sink = _StreamBuffer()
+    compression = zipfile.ZIP_DEFLATED if fmt == 'svg' else zipfile.ZIP_STORED  # PNG is already compressed
+    index = []
+    with zipfile.ZipFile(sink, 'w', compression=compression) as archive:
+        for i, image, error in results:
+            glycan, motif = items[i]
+            entry = {"index": i, "glycan": glycan, "highlight_motif": motif}
+            if image is None:
+                entry["error"] = error
+            else:
+                entry["file"] = f"{i:05d}.{fmt}"
+                archive.writestr(entry["file"], image)
+            index.append(entry)
+            yield sink.drain()
+        archive.writestr("index.json", json.dumps(index, indent=2))
+    yield sink.drain()
+
+
+def sprite_sheet(items, results):
+    """Packs PNG renders into rows of one sheet; returns (png bytes, index with each glycan's x/y/width/height)."""
+    from PIL import Image
+
+    index, images = [], []
+    for i, image, error in results:
+        glycan, motif = items[i]
+        entry = {"index": i, "glycan": glycan, "highlight_motif": motif}
+        if image is None:
+            entry["error"] = error
+        else:
+            images.append((entry, Image.open(io.BytesIO(image)).convert("RGBA")))
+        index.append(entry)
+    if not images:
+        return None, index
+
+    # Shelf packing: fill rows left to right up to roughly a square sheet.
+    total_area = sum(im.width * im.height for _, im in images)
+    sheet_width = max(max(im.width for _, im in images), int(math.sqrt(total_area)))
+    x = y = row_height = 0
+    for entry, im in images:
+        if x and x + im.width > sheet_width:
+            x, y, row_height = 0, y + row_height, 0
+        entry.update({"x": x, "y": y, "width": im.width, "height": im.height})
+        x += im.width
+        row_height = max(row_height, im.height)
+    sheet = Image.new("RGBA", (sheet_width, y + row_height), (255, 255, 255, 0))
+    for entry, im in images:
+        sheet.paste(im, (entry["x"], entry["y"]))
+    buf = io.BytesIO()
+    sheet.save(buf, format="PNG", optimize=True)
+    return buf.getvalue(), index
+
+
+def read_items(path):
+    items = []
+    with open(path, 'r') as f:
+        for line in f:
+            glycan, _, motif = line.rstrip("\n").partition("\t")
+            if glycan.strip():
+                items.append((glycan.strip(), motif.strip() or None))
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input")
+    parser.add_argument("output", help="zip file, or PNG sheet with --sprite")
+    parser.add_argument("--format", choices=sorted(RENDER_FORMATS), default="png")
+    parser.add_argument("--sprite", action="store_true", help="write one PNG sprite sheet plus a .json index")
+    parser.add_argument("--workers", type=int, default=RENDER_WORKERS)
+    parser.add_argument("--chunk-size", type=int, default=RENDER_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    global RENDER_BATCH_WORKERS
+    RENDER_BATCH_WORKERS = args.workers
+    items = read_items(args.input)
+    fmt = "png" if args.sprite else args.format
+    try:
+        results = render_batch(items, fmt, args.chunk_size, in_flight=2 * args.workers)
+        if args.sprite:
+            sheet, index = sprite_sheet(items, results)
+            if sheet is not None:
+                with open(args.output, 'wb') as f:
+                    f.write(sheet)
+            with open(f"{os.path.splitext(args.output)[0]}.json", 'w') as f:
+                json.dump(index, f, indent=2)
+        else:
+            with open(args.output, 'wb') as f:
+                for data in stream_zip(items, results, fmt):
+                    f.write(data)
+    finally:
+        shutdown_render_pools()
+    print(f"Rendered {len(items)} glycans into {args.output}.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Offline bulk scoring of a glycan library with the immunogenicity model.
+
+Streams the input CSV in chunks, tokenizes each chunk in a process pool while the previous chunk
+is being scored, runs batched inference and appends scores plus detected motifs to the output.
+Progress is checkpointed after every chunk, so an interrupted run resumes where it stopped.
+
+Run from src/Backend:
+    python score_library.py library.csv scores.csv --column glycan --workers 8
+    python score_library.py library.csv scores_parquet --format parquet
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from artifact_cache import atomic_write
+from glycoword_tokenizer import UnknownGlycowordError
+from model_api import TOKENIZER, VOCAB_SIZE, detect_known_motifs, process_glycans
+
+OUTPUT_COLUMNS = ["row", "glycan", "score", "prediction", "motifs_detected", "error"]
+
+
+def tokenize_chunk(sequences):
+    """Runs in a pool worker: returns (tokens or None, motifs, error) per sequence."""
+    out = []
+    for sequence in sequences:
+        sequence = sequence.strip() if isinstance(sequence, str) else ""
+        if not sequence:
+            out.append((None, [], "No sequence provided"))
+            continue
+        glycowords = process_glycans([sequence])
+        if not glycowords:
+            out.append((None, [], "Invalid glycan structure or too short to analyze."))
+            continue
+        try:
+            out.append((TOKENIZER.encode_glycowords(glycowords), detect_known_motifs(sequence), ""))
+        except UnknownGlycowordError:
+            out.append((None, [], "Prediction failed due to unknown glycowords."))
+    return out
+
+
+def tokenize_parallel(pool, sequences, workers):
+    step = max(1, -(-len(sequences) // (workers * 4)))
+    slices = [sequences[i:i + step] for i in range(0, len(sequences), step)]
+    return pool.map(tokenize_chunk, slices)
+
+
+def score_chunk(runtime, start_row, sequences, tokenized, batch_size):
+    valid = [i for i, (tokens, _, _) in enumerate(tokenized) if tokens]
+    scores = {}
+    for i in range(0, len(valid), batch_size):
+        idx = valid[i:i + batch_size]
+        for j, score in zip(idx, runtime.score_token_lists([tokenized[k][0] for k in idx])):
+            scores[j] = score
+
+    rows = []
+    for i, (sequence, (_, motifs, error)) in enumerate(zip(sequences, tokenized)):
+        score = scores.get(i)
+        rows.append({
+            "row": start_row + i,
+            "glycan": sequence,
+            "score": score,
+            "prediction": None if score is None else ("Immunogenic" if score >= 0.5 else "Non-Immunogenic"),
+            "motifs_detected": ";".join(motifs),
+            "error": error
+        })
+    return pd.DataFrame(rows, columns=OUTPUT_COLUMNS)
+
+
+# ============================ Checkpointing ================================
+
+def input_identity(path):
+    stat = os.stat(path)
+    return {"input": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def load_progress(progress_path, identity, args):
+    if args.restart or not os.path.exists(progress_path):
+        return None
+    with open(progress_path, 'r') as f:
+        progress = json.load(f)
+    expected = {**identity, "column": args.column, "chunk_size": args.chunk_size, "format": args.format}
+    if any(progress.get(k) != v for k, v in expected.items()):
+        sys.exit(f"{progress_path} belongs to a different input or settings; rerun with --restart.")
+    return progress
+
+
+def save_progress(progress_path, progress):
+    def write(path):
+        with open(path, 'w') as f:
+            json.dump(progress, f)
+    atomic_write(progress_path, write)
+
+
+def prepare_output(output, fmt, progress):
+    """Discards anything written after the last checkpoint (a partially appended chunk)."""
+    if fmt == "csv":
+        if progress and os.path.exists(output):
+            with open(output, 'r+b') as f:
+                f.truncate(progress["bytes_written"])
+        elif os.path.exists(output):
+            os.remove(output)
+    else:
+        os.makedirs(output, exist_ok=True)
+        done = progress["chunks_done"] if progress else 0
+        for name in os.listdir(output):
+            if name.startswith("part-") and int(name[5:11]) >= done:
+                os.remove(os.path.join(output, name))
+
+
+def write_chunk(output, fmt, chunk_no, df):
+    if fmt == "csv":
+        header = not os.path.exists(output) or os.path.getsize(output) == 0
+        with open(output, 'a', newline='') as f:
+            df.to_csv(f, header=header, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        return os.path.getsize(output)
+    df.to_parquet(os.path.join(output, f"part-{chunk_no:06d}.parquet"), index=False)
+    return 0
+
+# ================================ Main =====================================
+
+def process_pending(runtime, pending, args, progress, progress_path):
+    chunk_no, start_row, sequences, tokenized = pending
+    tokenized = [item for part in tokenized for item in part]
+    df = score_chunk(runtime, start_row, sequences, tokenized, args.batch_size)
+    bytes_written = write_chunk(args.output, args.format, chunk_no, df)
+    progress.update(chunks_done=chunk_no + 1, rows_done=progress["rows_done"] + len(df), bytes_written=bytes_written)
+    save_progress(progress_path, progress)
+    return len(df)
+
+
+def report(progress, rows_this_run, started):
+    elapsed = time.perf_counter() - started
+    rate = rows_this_run / elapsed if elapsed else 0.0
+    print(f"{progress['rows_done']:>12,} rows done | {rate:,.0f} rows/s | {elapsed:,.1f} s elapsed", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="CSV file with one glycan per row")
+    parser.add_argument("output", help="output CSV file, or output directory with --format parquet")
+    parser.add_argument("--column", default="glycan", help="column holding IUPAC-condensed sequences")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--chunk-size", type=int, default=20000, help="rows read, tokenized and written at a time")
+    parser.add_argument("--batch-size", type=int, default=1024, help="graphs per forward pass")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="tokenizer processes")
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads for inference")
+    parser.add_argument("--restart", action="store_true", help="ignore any checkpoint and start over")
+    args = parser.parse_args()
+
+    # Imported here so the spawned tokenizer workers, which import this module, never load torch.
+    import torch
+    from model_runtime import ModelRuntime
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    runtime = ModelRuntime(VOCAB_SIZE)
+
+    progress_path = f"{args.output.rstrip(os.sep)}.progress.json"
+    identity = input_identity(args.input)
+    progress = load_progress(progress_path, identity, args)
+    prepare_output(args.output, args.format, progress)
+    progress = progress or {**identity, "column": args.column, "chunk_size": args.chunk_size, "format": args.format,
+                            "chunks_done": 0, "rows_done": 0, "bytes_written": 0}
+    if progress["chunks_done"]:
+        print(f"Resuming after {progress['rows_done']} rows ({progress['chunks_done']} chunks).", file=sys.stderr)
+
+    reader = pd.read_csv(args.input, usecols=[args.column], chunksize=args.chunk_size)
+    started = time.perf_counter()
+    rows_this_run = 0
+
+    # spawn, not fork: the parent already holds torch/OpenMP state that forked children should not inherit.
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = None  # (chunk_no, start_row, sequences, tokenized parts)
+        for chunk_no, chunk in enumerate(reader):
+            if chunk_no < progress["chunks_done"]:
+                continue
+            sequences = chunk[args.column].tolist()
+            # Tokenize this chunk in the pool while the previous one is scored below.
+            submitted = (chunk_no, chunk.index[0], sequences, tokenize_parallel(pool, sequences, args.workers))
+            if pending:
+                rows_this_run += process_pending(runtime, pending, args, progress, progress_path)
+                report(progress, rows_this_run, started)
+            pending = submitted
+        if pending:
+            rows_this_run += process_pending(runtime, pending, args, progress, progress_path)
+            report(progress, rows_this_run, started)
+
+    print(f"Done: {progress['rows_done']} rows scored into {args.output}.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,25 +2,33 @@ from flask import Blueprint, request, send_file
 import pandas as pd
 import copy
 import os
-from glycowork.glycan_data.loader import df_species
 
-species_api = Blueprint('species_api', __name__)
+from lazy_loading import LazyResource
 
-# Load the DataFrame
-species_df = pd.DataFrame(copy.deepcopy(df_species))
+species_api = Blueprint('species_api', __name__)
 
-# ✅ Safe CSV save: only write if not already written
 csv_path = "species_data.csv"
-if not os.path.exists(csv_path):
-    try:
-        species_df.to_csv(csv_path, index=False)
-    except PermissionError as e:
-        print(f"[ERROR] Could not write {csv_path}: {e}")
+
+def _load_species_df():
+    # Importing glycowork's loader and copying df_species is deferred to first use (or warm-up).
+    from glycowork.glycan_data.loader import df_species
+    species_df = pd.DataFrame(copy.deepcopy(df_species))
+
+    # ✅ Safe CSV save: only write if not already written
+    if not os.path.exists(csv_path):
+        try:
+            species_df.to_csv(csv_path, index=False)
+        except PermissionError as e:
+            print(f"[ERROR] Could not write {csv_path}: {e}")
+    return species_df
+
+SPECIES_DF = LazyResource("glycowork species frame", _load_species_df)
 
 @species_api.route("/api/download", methods=["GET"])
 def download_species_data():
     species_name = request.args.get('species', '').strip()
     if species_name:
+        species_df = SPECIES_DF.get()
         filtered_df = species_df[species_df['Species'].str.contains(species_name, case=False, na=False)]
         filtered_file_path = f"filtered_{species_name.replace(' ', '_')}.csv"
 
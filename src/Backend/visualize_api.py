@@ -1,36 +1,39 @@
 from flask import Blueprint, request, jsonify
-from glycowork.motif.processing import canonicalize_iupac, IUPAC_to_SMILES
-from rdkit import Chem
-from rdkit.Chem import AllChem
+import os
+
+from conformer_cache import CONFORMERS, EmbeddingCrashed, EmbeddingError, EmbeddingTimeout
+from iupac_cache import canonical_smiles
+from job_queue import async_job
 
 
 visualize_api = Blueprint('visualize_api', __name__)
 
+# Seconds a cache miss may spend embedding before /visualize gives up (the offline job has no such limit).
+VISUALIZE_EMBED_BUDGET = float(os.environ.get("VISUALIZE_EMBED_BUDGET", 20))
+
 @visualize_api.route("/visualize", methods=["POST"])
+@async_job("visualize", concurrency=2)
 def convert_glycan():
     data = request.get_json()
     iupac_seq = data.get("iupac")
-    
+
     if not iupac_seq:
         return jsonify({"error": "Missing glycan sequence"}), 400
 
     try:
-        canonical_seq = canonicalize_iupac(iupac_seq.strip())
-        smiles = IUPAC_to_SMILES([canonical_seq])[0]
+        canonical_seq, smiles = canonical_smiles(iupac_seq)
 
         if not smiles:
             return jsonify({"error": "Failed to convert to SMILES"}), 400
 
-        mol = Chem.MolFromSmiles(smiles)
-        mol = Chem.AddHs(mol)
-
-        if AllChem.EmbedMolecule(mol, randomSeed=0xf00d) != 0:
-            return jsonify({"error": "3D embedding failed"}), 500
-
-        AllChem.MMFFOptimizeMolecule(mol)
-        mol_block = Chem.MolToMolBlock(mol)
-
+        mol_block = CONFORMERS.get_or_embed(canonical_seq, smiles, VISUALIZE_EMBED_BUDGET)
         return jsonify({"molBlock": mol_block})
 
+    except EmbeddingTimeout as e:
+        return jsonify({"error": f"{str(e)}; the structure is too large to embed on request."}), 504
+    except EmbeddingCrashed as e:
+        return jsonify({"error": f"{str(e)}; please try again."}), 503
+    except EmbeddingError as e:
+        return jsonify({"error": str(e)}), 500
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500